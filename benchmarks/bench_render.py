@@ -0,0 +1,189 @@
+# benchmarks/bench_render.py
+import argparse
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from data import ImageStore, MarketData, ReportData
+from report import Instrumentation, ReportGenerator
+
+MARKET_COUNTS = [1, 10, 100, 500]
+IMAGE_SIZES = [(800, 400), (1920, 1080), (3840, 2160)]
+PARAMETER_ROWS = [10, 100, 1000, 5000]
+# (markets, bars per market) rendered from raw equity data instead of screenshots
+EQUITY_SERIES = [(100, 100_000), (200, 1_000_000)]
+
+def build_cases(quick=False):
+    markets = MARKET_COUNTS[:3] if quick else MARKET_COUNTS
+    rows = PARAMETER_ROWS[:3] if quick else PARAMETER_ROWS
+    sizes = IMAGE_SIZES[:2] if quick else IMAGE_SIZES
+    cases = []
+    for count in markets:
+        cases.append({'name': f"markets-{count}", 'markets': count, 'image_size': (640, 320), 'parameters': 10})
+    # Same as the largest market count, with market sections spooled to disk
+    cases.append({'name': f"markets-{markets[-1]}-low-memory", 'markets': markets[-1], 'image_size': (640, 320),
+                  'parameters': 10, 'low_memory': True})
+    for width, height in sizes:
+        cases.append({'name': f"images-{width}x{height}", 'markets': 10, 'image_size': (width, height), 'parameters': 10})
+    for count in rows:
+        cases.append({'name': f"parameters-{count}", 'markets': 1, 'image_size': (640, 320), 'parameters': count})
+    for count, bars in EQUITY_SERIES[:1] if quick else EQUITY_SERIES:
+        cases.append({'name': f"equity-{count}x{bars}", 'markets': count, 'image_size': None, 'parameters': 10,
+                      'equity_bars': bars})
+    return cases
+
+def peak_rss_bytes():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def make_chart(path, size, seed):
+    rng = random.Random(seed)
+    image = Image.new('RGB', size, 'white')
+    draw = ImageDraw.Draw(image)
+    width, height = size
+    points = []
+    value = height / 2
+    for x in range(0, width, 4):
+        value = min(height - 1, max(0, value + rng.uniform(-height / 50, height / 50)))
+        points.append((x, value))
+    draw.line(points, fill=(rng.randrange(256), 60, 160), width=2)
+    for y in range(0, height, height // 8 or 1):
+        draw.line([(0, y), (width, y)], fill=(220, 220, 220))
+    image.save(path, format='PNG')
+
+def build_report_data(case, image_dir):
+    market_data = MarketData(ImageStore())
+    for index in range(case['markets']):
+        name = f"MKT{index:04d}"
+        market_data.add_market(name)
+        market_data.set_market_data(name, 'timeframe', '1h')
+        market_data.set_market_data(name, 'data_source', 'Synthetic')
+        market_data.set_market_data(name, 'notes', f"Synthetic notes for {name}. " * 5)
+        if case.get('equity_bars'):
+            path = os.path.join(image_dir, f"{name}-equity.npy")
+            rng = np.random.default_rng(index)
+            np.save(path, 10000 + np.cumsum(rng.normal(0.2, 10, case['equity_bars'])))
+            market_data.set_market_equity(name, path)
+            continue
+        for offset, image_type in enumerate(['equity_curve', 'performance_metrics']):
+            path = os.path.join(image_dir, f"{name}-{image_type}.png")
+            make_chart(path, case['image_size'], seed=index * 2 + offset)
+            market_data.set_market_image(name, image_type, path)
+
+    parameters = [[f"param_{i}", f"Parameter {i}", str(i), '1', '1', str(i + 10), str(i + 3)]
+                  for i in range(case['parameters'])]
+    strategy = {'strategy_name': 'Benchmark', 'specific_goal': 'measure rendering',
+                'optimisation_method': 'Grid search', 'target_performance': 'Net profit'}
+    return ReportData(strategy, parameters=parameters, market_data=market_data)
+
+def run_case(case):
+    with tempfile.TemporaryDirectory(prefix='report-bench-') as work_dir:
+        report_data = build_report_data(case, work_dir)
+        output_path = os.path.join(work_dir, 'report.docx')
+        phases = []
+        started = time.perf_counter()
+
+        def on_progress(done, total, message):
+            phases.append({'phase': message, 'elapsed': time.perf_counter() - started, 'peak_rss': peak_rss_bytes()})
+
+        instrumentation = Instrumentation()
+        ReportGenerator(report_data, progress=on_progress, instrumentation=instrumentation,
+                        low_memory=case.get('low_memory', False)).generate(output_path)
+        wall_time = time.perf_counter() - started
+
+        # Edit one market and render again, only that market's section should be rebuilt
+        edited = sorted(report_data.market_data.get_markets())[0]
+        report_data.market_data.set_market_data(edited, 'notes', "Edited notes.")
+        rerender_started = time.perf_counter()
+        ReportGenerator(report_data, instrumentation=Instrumentation(),
+                        low_memory=case.get('low_memory', False)).generate(output_path)
+        rerender_time = time.perf_counter() - rerender_started
+
+        phase_seconds = {}
+        for span in instrumentation.spans:
+            if '/' not in span['path']:
+                phase_seconds[span['path']] = phase_seconds.get(span['path'], 0) + span['seconds']
+
+        return dict(case, wall_time=wall_time, rerender_time=rerender_time, peak_rss=peak_rss_bytes(), output_bytes=os.path.getsize(output_path),
+                    phase_seconds=phase_seconds, counters=instrumentation.counters,
+                    phases=[p for p in phases if not p['phase'].startswith('Results: ')])
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(baseline_path, results):
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = {case['name']: case for case in json.load(f)['cases']}
+    print(f"{'case':<24}{'wall (s)':>12}{'vs base':>10}{'rerender':>10}{'rss (MB)':>12}{'vs base':>10}")
+    for case in results['cases']:
+        base = baseline.get(case['name'])
+        wall_ratio = f"{case['wall_time'] / base['wall_time']:.2f}x" if base else '-'
+        rss = (case['peak_rss'] or 0) / 2 ** 20
+        rss_ratio = f"{case['peak_rss'] / base['peak_rss']:.2f}x" if base and base.get('peak_rss') else '-'
+        print(f"{case['name']:<24}{case['wall_time']:>12.3f}{wall_ratio:>10}{case['rerender_time']:>10.3f}"
+              f"{rss:>12.1f}{rss_ratio:>10}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark report rendering at scale.")
+    parser.add_argument('-o', '--output', help="JSON file to write (default benchmarks/results/<commit>.json)")
+    parser.add_argument('--quick', action='store_true', help="skip the largest cases")
+    parser.add_argument('--case', action='append', help="only run cases with this name")
+    parser.add_argument('--compare', help="previous results JSON to compare against")
+    args = parser.parse_args(argv)
+
+    cases = build_cases(args.quick)
+    if args.case:
+        cases = [case for case in cases if case['name'] in args.case]
+
+    # A fresh process per case so peak RSS is not inherited from earlier cases
+    context = multiprocessing.get_context('spawn')
+    results = {
+        'commit': git_commit(),
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cases': [],
+    }
+    with context.Pool(processes=1, maxtasksperchild=1) as pool:
+        for case in cases:
+            result = pool.apply(run_case, (case,))
+            results['cases'].append(result)
+            print(f"{case['name']:<24} {result['wall_time']:8.3f}s  rerender {result['rerender_time']:8.3f}s  "
+                  f"{(result['peak_rss'] or 0) / 2 ** 20:8.1f} MB  "
+                  f"{result['output_bytes'] / 2 ** 20:8.2f} MB output")
+
+    output = args.output or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results',
+                                         f"{results['commit'] or 'unknown'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=1)
+    print(f"Results written to {output}")
+
+    if args.compare:
+        compare(args.compare, results)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,110 @@
+# benchmarks/bench_startup.py
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+
+from .bench_render import git_commit
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# None of these should be imported before the window is up
+HEAVY_MODULES = ['docx', 'lxml', 'PIL', 'report']
+
+WINDOW_SCRIPT = """
+import time
+started = time.perf_counter()
+import tkinter as tk
+import main
+root = tk.Tk()
+main.EnhancedReportGeneratorGUI(root)
+root.update()
+print(time.perf_counter() - started)
+root.destroy()
+"""
+
+def parse_importtime(stderr):
+    # Lines look like "import time:   self [us] | cumulative | imported package"
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules.append({'module': name.strip(), 'depth': (len(name) - len(name.lstrip())) // 2,
+                        'self_us': int(self_us), 'cumulative_us': int(cumulative_us)})
+    return modules
+
+def measure_imports(target):
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {target}'], cwd=REPO_ROOT,
+                            capture_output=True, text=True, check=True)
+    modules = parse_importtime(result.stderr)
+    total = next(m['cumulative_us'] for m in reversed(modules) if m['module'] == target)
+    return total, modules
+
+def measure_window():
+    # Needs a display, so it is only run with --window
+    result = subprocess.run([sys.executable, '-c', WINDOW_SCRIPT], cwd=REPO_ROOT, capture_output=True, text=True,
+                            check=True)
+    return float(result.stdout.strip().splitlines()[-1])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark application startup with python -X importtime.")
+    parser.add_argument('-o', '--output', help="JSON file to write (default benchmarks/results/startup-<commit>.json)")
+    parser.add_argument('--runs', type=int, default=5, help="fresh interpreters to start, the median is reported")
+    parser.add_argument('--top', type=int, default=15, help="how many of the slowest modules to list")
+    parser.add_argument('--target', default='main', help="module to import")
+    parser.add_argument('--window', action='store_true', help="also time until the main window is drawn")
+    parser.add_argument('--compare', help="previous results JSON to compare against")
+    args = parser.parse_args(argv)
+
+    totals = []
+    modules = []
+    for _ in range(args.runs):
+        total, modules = measure_imports(args.target)
+        totals.append(total)
+    loaded = {m['module'].split('.')[0] for m in modules}
+
+    results = {
+        'commit': git_commit(),
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'target': args.target,
+        'import_us': statistics.median(totals),
+        'import_runs_us': totals,
+        'heavy_modules_loaded': [name for name in HEAVY_MODULES if name in loaded],
+        'slowest_modules': sorted(modules, key=lambda m: m['self_us'], reverse=True)[:args.top],
+        'window_seconds': None,
+    }
+    if args.window:
+        results['window_seconds'] = statistics.median(measure_window() for _ in range(args.runs))
+
+    print(f"import {args.target}: {results['import_us'] / 1000:.1f} ms (median of {args.runs})")
+    print(f"heavy modules loaded at import: {', '.join(results['heavy_modules_loaded']) or 'none'}")
+    if results['window_seconds'] is not None:
+        print(f"window drawn after: {results['window_seconds']:.3f} s")
+    print(f"{'module':<40}{'self (ms)':>12}{'cumulative (ms)':>18}")
+    for module in results['slowest_modules']:
+        print(f"{module['module']:<40}{module['self_us'] / 1000:>12.2f}{module['cumulative_us'] / 1000:>18.2f}")
+
+    output = args.output or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results',
+                                         f"startup-{results['commit'] or 'unknown'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=1)
+    print(f"Results written to {output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        print(f"import {args.target}: {baseline['import_us'] / 1000:.1f} ms -> {results['import_us'] / 1000:.1f} ms "
+              f"({results['import_us'] / baseline['import_us']:.2f}x)")
+        if baseline.get('window_seconds') and results['window_seconds']:
+            print(f"window: {baseline['window_seconds']:.3f} s -> {results['window_seconds']:.3f} s")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,2 +1,9 @@
 # data/__init__.py
-from .market_data import MarketData
\ No newline at end of file
+from .equity_series import EquitySeries
+from .image_handle import ImageHandle
+from .image_store import ImageStore, image_store
+from .importers import MARKET_IMPORT, PARAMETER_IMPORT, import_into, iter_import_chunks
+from .market_data import MarketData
+from .project import PROJECT_EXTENSION, load_project, save_project
+from .report_data import ReportData
+from .table_model import TableModel
\ No newline at end of file
@@ -0,0 +1,97 @@
+# data/equity_series.py
+import csv
+import io
+import os
+import zipfile
+
+from .image_handle import file_sha1
+
+SERIES_FORMATS = {'.npy': 'npy', '.csv': 'csv', '.txt': 'csv'}
+# A CSV header naming one of these picks the equity column, otherwise the last column is used
+EQUITY_COLUMNS = ['equity', 'balance', 'nav', 'value', 'cumulative_pnl', 'pnl', 'close']
+
+def _equity_column(header):
+    names = [name.strip().lower() for name in header]
+    for name in EQUITY_COLUMNS:
+        if name in names:
+            return names.index(name)
+    return len(names) - 1
+
+def _is_number(value):
+    try:
+        float(value)
+    except ValueError:
+        return False
+    return True
+
+def read_csv_series(f):
+    import numpy as np
+
+    text = io.TextIOWrapper(f, encoding='utf-8-sig', newline='')
+    first = text.readline()
+    try:
+        delimiter = csv.Sniffer().sniff(first, delimiters=',;\t').delimiter
+    except csv.Error:
+        delimiter = ','
+    header = next(csv.reader([first], delimiter=delimiter))
+    column = _equity_column(header)
+    values = np.loadtxt(text, delimiter=delimiter, usecols=column, dtype=np.float64, ndmin=1)
+    if _is_number(header[column]):
+        # No header row, the first line is data
+        values = np.concatenate(([float(header[column])], values))
+    return values
+
+class EquitySeries:
+    # Raw equity curve of one market. Like ImageHandle it only points at the data, which is read
+    # when metrics or a chart are computed. `member` is set when it lives inside a project archive
+    def __init__(self, path, sha1, format, size, member=None):
+        self.path = path
+        self.sha1 = sha1
+        self.format = format
+        self.size = size
+        self.member = member
+
+    @classmethod
+    def from_path(cls, path):
+        path = os.path.abspath(path)
+        series_format = SERIES_FORMATS.get(os.path.splitext(path)[1].lower())
+        if series_format is None:
+            raise ValueError(f"Equity data must be a .csv or .npy file: {path}")
+        return cls(path, file_sha1(path), series_format, os.path.getsize(path))
+
+    @property
+    def ext(self):
+        return self.format
+
+    @property
+    def filename(self):
+        return os.path.basename(self.member or self.path)
+
+    def open(self):
+        if self.member is None:
+            return open(self.path, 'rb')
+        with zipfile.ZipFile(self.path) as archive:
+            return archive.open(self.member)
+
+    def values(self):
+        # A 1-D float64 array. For 2-D arrays the last column is the equity, the first is usually time
+        import numpy as np
+
+        if self.format == 'npy' and self.member is None:
+            values = np.load(self.path, mmap_mode='r')
+        else:
+            with self.open() as f:
+                values = np.load(f) if self.format == 'npy' else read_csv_series(f)
+        if values.ndim == 2:
+            values = values[:, -1]
+        values = np.asarray(values, dtype=np.float64).ravel()
+        return values[np.isfinite(values)]
+
+    def __eq__(self, other):
+        return isinstance(other, EquitySeries) and other.sha1 == self.sha1
+
+    def __hash__(self):
+        return hash(self.sha1)
+
+    def __repr__(self):
+        return f"EquitySeries({self.path!r}, {self.format})"
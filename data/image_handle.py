@@ -0,0 +1,104 @@
+# data/image_handle.py
+import hashlib
+import mmap
+import os
+import struct
+import zipfile
+
+# Formats Word can embed as-is
+CONTENT_TYPES = {
+    'PNG': 'image/png',
+    'JPEG': 'image/jpeg',
+    'GIF': 'image/gif',
+    'BMP': 'image/bmp',
+    'TIFF': 'image/tiff',
+}
+EXTENSIONS = {'PNG': 'png', 'JPEG': 'jpg', 'GIF': 'gif', 'BMP': 'bmp', 'TIFF': 'tiff'}
+
+def file_sha1(path):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+# Fixed part of a zip local file header, followed by the name and extra field
+_LOCAL_HEADER = struct.Struct('<4s2B4HL2L2H')
+
+class ImageHandle:
+    # `member` is set when the image lives inside a project archive rather than on its own
+    def __init__(self, path, sha1, width, height, format, size, member=None):
+        self.path = path
+        self.sha1 = sha1
+        self.width = width
+        self.height = height
+        self.format = format
+        self.size = size
+        self.member = member
+        self._offset = None
+
+    @classmethod
+    def from_path(cls, path):
+        # PIL is only loaded once an image is actually added, it is slow to import
+        from PIL import Image
+
+        path = os.path.abspath(path)
+        # Image.open only parses the header, pixel data is never decoded here
+        with Image.open(path) as image:
+            width, height = image.size
+            image_format = image.format
+        if image_format not in CONTENT_TYPES:
+            raise ValueError(f"Unsupported image format {image_format} for {path}")
+        return cls(path, file_sha1(path), width, height, image_format, os.path.getsize(path))
+
+    @property
+    def content_type(self):
+        return CONTENT_TYPES[self.format]
+
+    @property
+    def ext(self):
+        return EXTENSIONS[self.format]
+
+    @property
+    def filename(self):
+        return os.path.basename(self.member or self.path)
+
+    def open(self):
+        if self.member is None:
+            return open(self.path, 'rb')
+        # The returned member stream keeps the archive file open until it is closed
+        with zipfile.ZipFile(self.path) as archive:
+            return archive.open(self.member)
+
+    def _data_offset(self, f):
+        if self.member is None:
+            return 0
+        # Saving the project again moves its members, so the offset only holds for this version of the file
+        stat = os.fstat(f.fileno())
+        stat_key = (stat.st_mtime_ns, stat.st_size)
+        if self._offset is None or self._offset[0] != stat_key:
+            with zipfile.ZipFile(f) as archive:
+                info = archive.getinfo(self.member)
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f"{self.member} in {self.path} is compressed")
+            f.seek(info.header_offset)
+            fields = _LOCAL_HEADER.unpack(f.read(_LOCAL_HEADER.size))
+            self._offset = (stat_key, info.header_offset + _LOCAL_HEADER.size + fields[-2] + fields[-1])
+        return self._offset[1]
+
+    def read(self):
+        with open(self.path, 'rb') as f:
+            if self.size == 0:
+                return b''
+            offset = self._data_offset(f)
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return mapped[offset:offset + self.size]
+
+    def __eq__(self, other):
+        return isinstance(other, ImageHandle) and other.sha1 == self.sha1
+
+    def __hash__(self):
+        return hash(self.sha1)
+
+    def __repr__(self):
+        return f"ImageHandle({self.path!r}, {self.width}x{self.height} {self.format})"
@@ -0,0 +1,64 @@
+# data/image_store.py
+import os
+import threading
+
+from .image_handle import ImageHandle
+
+class ImageStore:
+    def __init__(self):
+        self._images = {}
+        self._paths = {}
+        self._processed = {}
+        self._lock = threading.Lock()
+
+    def add_file(self, path):
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        path_key = (path, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            handle = self._paths.get(path_key)
+        if handle is None:
+            # Hash and probe outside the lock, files can be large
+            handle = ImageHandle.from_path(path)
+            with self._lock:
+                self._paths[path_key] = handle
+        return self.add(handle)
+
+    def add(self, handle):
+        # The newest handle for a hash wins while its file exists. The file an earlier one points at
+        # may have been deleted, or be a project that was moved since. A handle whose file is gone,
+        # e.g. from a cached fragment, gets the stored one instead
+        with self._lock:
+            existing = self._images.get(handle.sha1)
+            if existing is None or (existing.path, existing.member) == (handle.path, handle.member):
+                return self._images.setdefault(handle.sha1, handle)
+        if not os.path.exists(handle.path):
+            return existing
+        with self._lock:
+            self._images[handle.sha1] = handle
+            return handle
+
+    def processed(self, handle, key, build):
+        # Derived versions of an image (e.g. resized) are cached by content hash, not by path
+        cache_key = (handle.sha1, key)
+        with self._lock:
+            if cache_key in self._processed:
+                return self._processed[cache_key]
+        result = build(handle)
+        with self._lock:
+            return self._processed.setdefault(cache_key, result)
+
+    def __contains__(self, sha1):
+        return sha1 in self._images
+
+    def __len__(self):
+        return len(self._images)
+
+    def clear(self):
+        with self._lock:
+            self._images.clear()
+            self._paths.clear()
+            self._processed.clear()
+
+# Shared by every MarketData in the process so batches reuse hashes across reports
+image_store = ImageStore()
@@ -0,0 +1,128 @@
+# data/importers.py
+import csv
+import json
+import os
+import re
+
+from .report_data import MARKET_FIELDS, PARAMETER_FIELDS
+
+CHUNK_SIZE = 5000
+
+PARAMETER_ALIASES = {
+    'name': ['name', 'parameter', 'param', 'input', 'variable'],
+    'description': ['description', 'desc', 'comment', 'label'],
+    'default': ['default', 'default value', 'initial'],
+    'start': ['start', 'min', 'minimum', 'from', 'lower'],
+    'step': ['step', 'increment', 'step size'],
+    'end': ['end', 'max', 'maximum', 'to', 'stop', 'upper'],
+    'best': ['best', 'optimal', 'optimum', 'best value', 'result'],
+}
+
+MARKET_ALIASES = {
+    'market': ['market', 'symbol', 'instrument', 'ticker'],
+    'timeframe': ['timeframe', 'time frame', 'interval', 'bar size', 'period'],
+    'data_source': ['data source', 'source', 'datasource', 'feed', 'provider'],
+    'optimisation_timespan': ['optimisation timespan', 'optimization timespan', 'in sample', 'in-sample',
+                              'optimisation period', 'optimization period'],
+    'out_of_sample_timespan': ['out-of-sample timespan', 'out of sample timespan', 'out of sample',
+                               'out-of-sample', 'oos'],
+}
+
+PARAMETER_IMPORT = (PARAMETER_FIELDS, PARAMETER_ALIASES)
+MARKET_IMPORT = (['market'] + MARKET_FIELDS, MARKET_ALIASES)
+
+def _normalise_header(name):
+    return re.sub(r'[\s_]+', ' ', str(name).strip().lower())
+
+def map_columns(header, fields, aliases):
+    # For each target field, the index of the source column holding it (or None)
+    lookup = {}
+    for index, name in enumerate(header):
+        lookup.setdefault(_normalise_header(name), index)
+    mapping = []
+    for field in fields:
+        candidates = [_normalise_header(field)] + aliases.get(field, [])
+        mapping.append(next((lookup[c] for c in candidates if c in lookup), None))
+    if mapping[0] is None:
+        raise ValueError(f"No column for '{fields[0]}' in {list(header)}")
+    return mapping
+
+def _project(row, mapping):
+    return [row[index] if index is not None and index < len(row) else '' for index in mapping]
+
+def _chunks(rows, chunk_size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _csv_rows(path, fields, aliases):
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        sample = f.read(4096)
+        f.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=',;\t|')
+        except csv.Error:
+            dialect = csv.excel
+        reader = csv.reader(f, dialect)
+        header = next(reader, None)
+        if header is None:
+            return
+        mapping = map_columns(header, fields, aliases)
+        for row in reader:
+            if any(row):
+                yield _project(row, mapping)
+
+def _json_records(path):
+    if path.lower().endswith(('.jsonl', '.ndjson')):
+        # One record per line, read as a stream
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        return
+
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        # e.g. {"parameters": [...]} or {"markets": [...]}
+        data = next((value for value in data.values() if isinstance(value, list)), [])
+    yield from data
+
+def _json_rows(path, fields, aliases):
+    mapping = None
+    for record in _json_records(path):
+        if isinstance(record, dict):
+            header = list(record.keys())
+            if mapping is None or header != mapping[0]:
+                mapping = (header, map_columns(header, fields, aliases))
+            yield _project(list(record.values()), mapping[1])
+        else:
+            yield [str(value) for value in record]
+
+def iter_import_chunks(path, kind=PARAMETER_IMPORT, chunk_size=CHUNK_SIZE):
+    fields, aliases = kind
+    ext = os.path.splitext(path)[1].lower()
+    if ext in ('.json', '.jsonl', '.ndjson'):
+        rows = _json_rows(path, fields, aliases)
+    else:
+        rows = _csv_rows(path, fields, aliases)
+    for chunk in _chunks(rows, chunk_size):
+        yield [['' if value is None else str(value) for value in row] for row in chunk]
+
+def import_into(model, path, kind=PARAMETER_IMPORT, chunk_size=CHUNK_SIZE):
+    # Chunks go straight into the model, only one notification at the end
+    listeners, model.listeners = model.listeners, []
+    count = 0
+    try:
+        for chunk in iter_import_chunks(path, kind, chunk_size):
+            model.extend(chunk)
+            count += len(chunk)
+    finally:
+        model.listeners = listeners
+    model.notify_listeners()
+    return count
@@ -1,8 +1,30 @@
 # data/market_data.py
+from .equity_series import EquitySeries
+from .image_store import image_store
 
 class MarketData:
-    def __init__(self):
+    # Observers are called as observer(event, market, detail):
+    #   'add'     market, None
+    #   'remove'  market, None
+    #   'rename'  old name, new name
+    #   'update'  market, the field that changed
+    #   'reorder' None, the new list of markets
+    #   'reset'   None, None (everything was replaced)
+    def __init__(self, images=None):
         self.data = {}
+        self.images = images if images is not None else image_store
+        self.observers = []
+
+    def add_observer(self, observer):
+        self.observers.append(observer)
+
+    def remove_observer(self, observer):
+        if observer in self.observers:
+            self.observers.remove(observer)
+
+    def notify_observers(self, event, market=None, detail=None):
+        for observer in self.observers:
+            observer(event, market, detail)
 
     def add_market(self, market_name):
         if market_name not in self.data:
@@ -13,12 +35,23 @@ class MarketData:
                 'out_of_sample_timespan': '',
                 'equity_curve': None,
                 'performance_metrics': None,
+                'equity_data': None,
                 'notes': ''
             }
+            self.notify_observers('add', market_name)
 
     def remove_market(self, market_name):
         if market_name in self.data:
             del self.data[market_name]
+            self.notify_observers('remove', market_name)
+
+    def rename_market(self, old_name, new_name):
+        # Keeps the market's position, images and notes
+        if old_name not in self.data or new_name in self.data or old_name == new_name:
+            return False
+        self.data = {new_name if market == old_name else market: data for market, data in self.data.items()}
+        self.notify_observers('rename', old_name, new_name)
+        return True
 
     def get_markets(self):
         return list(self.data.keys())
@@ -26,7 +59,22 @@ class MarketData:
     def set_market_data(self, market_name, key, value):
         if market_name not in self.data:
             self.add_market(market_name)
-        self.data[market_name][key] = value
+        if key not in self.data[market_name] or self.data[market_name][key] != value:
+            self.data[market_name][key] = value
+            self.notify_observers('update', market_name, key)
+        elif self.data[market_name][key] is not value:
+            # The same image from another file, the old one may be gone
+            self.data[market_name][key] = value
+
+    def set_market_image(self, market_name, key, path):
+        handle = self.images.add_file(path)
+        self.set_market_data(market_name, key, handle)
+        return handle
+
+    def set_market_equity(self, market_name, path):
+        series = EquitySeries.from_path(path)
+        self.set_market_data(market_name, 'equity_data', series)
+        return series
 
     def get_market_data(self, market_name):
         return self.data.get(market_name, None)
@@ -34,5 +82,35 @@ class MarketData:
     def get_all_data(self):
         return self.data
 
+    def sync_markets(self, rows, renames=None):
+        # rows is [(market, {field: value})] in table order; only the differences are applied and announced
+        for old_name, new_name in (renames or {}).items():
+            self.rename_market(old_name, new_name)
+
+        names = list(dict.fromkeys(market for market, _ in rows))
+        wanted = set(names)
+        for market in [market for market in self.data if market not in wanted]:
+            self.remove_market(market)
+
+        for market, fields in rows:
+            self.add_market(market)
+            for key, value in fields.items():
+                self.set_market_data(market, key, value)
+
+        if list(self.data) != names:
+            self.data = {market: self.data[market] for market in names}
+            self.notify_observers('reorder', None, names)
+
     def clear_all_markets(self):
-        self.data.clear()
\ No newline at end of file
+        self.data.clear()
+        self.notify_observers('reset')
+
+    def replace_all(self, other):
+        self.data = {market: dict(data) for market, data in other.data.items()}
+        self.notify_observers('reset')
+
+    def copy(self):
+        # Snapshots do not carry the observers
+        snapshot = MarketData(self.images)
+        snapshot.data = {market: dict(data) for market, data in self.data.items()}
+        return snapshot
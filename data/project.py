@@ -0,0 +1,104 @@
+# data/project.py
+import json
+import os
+import tempfile
+import zipfile
+
+from .equity_series import EquitySeries
+from .image_handle import ImageHandle
+from .market_data import MarketData
+from .report_data import IMAGE_FIELDS, MARKET_FIELDS, SERIES_FIELD, ReportData
+
+PROJECT_EXTENSION = '.rproj'
+PROJECT_VERSION = 1
+INDEX_NAME = 'project.json'
+
+def _image_member(handle):
+    return f"images/{handle.sha1}.{handle.ext}"
+
+def _series_member(series):
+    return f"series/{series.sha1}.{series.ext}"
+
+def _copy_into(archive, info, handle):
+    with handle.open() as source, archive.open(info, 'w') as target:
+        for chunk in iter(lambda: source.read(1 << 20), b''):
+            target.write(chunk)
+
+def save_project(path, report_data):
+    markets = []
+    images = {}
+    series_files = {}
+    for market, data in report_data.get_results_data().items():
+        entry = {'name': market, 'notes': data['notes']}
+        entry.update({field: data[field] for field in MARKET_FIELDS})
+        for field in IMAGE_FIELDS:
+            handle = data[field]
+            if handle:
+                images[handle.sha1] = handle
+                entry[field] = {'member': _image_member(handle), 'sha1': handle.sha1, 'format': handle.format,
+                                'width': handle.width, 'height': handle.height, 'size': handle.size}
+        series = data.get(SERIES_FIELD)
+        if series:
+            series_files[series.sha1] = series
+            entry[SERIES_FIELD] = {'member': _series_member(series), 'sha1': series.sha1, 'format': series.format,
+                                   'size': series.size}
+        markets.append(entry)
+
+    index = {
+        'version': PROJECT_VERSION,
+        'strategy': report_data.strategy,
+        'intro_table': report_data.intro_table,
+        'parameters': report_data.get_parameter_data(),
+        'markets': markets,
+    }
+
+    # Write next to the target and swap in, images may be streamed from the file being replaced
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(suffix=PROJECT_EXTENSION, dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f, zipfile.ZipFile(f, 'w', zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr(INDEX_NAME, json.dumps(index, indent=1))
+            # Images are already compressed and are stored as-is so they can be mapped straight from the archive
+            for handle in images.values():
+                info = zipfile.ZipInfo(_image_member(handle))
+                info.file_size = handle.size
+                _copy_into(archive, info, handle)
+            # Equity data compresses well and is always read through the archive
+            for series in series_files.values():
+                info = zipfile.ZipInfo(_series_member(series))
+                info.compress_type = zipfile.ZIP_DEFLATED
+                _copy_into(archive, info, series)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+def load_project(path, images=None):
+    # Only the index is read, image blobs stay in the archive until something needs them
+    path = os.path.abspath(path)
+    with zipfile.ZipFile(path) as archive:
+        index = json.loads(archive.read(INDEX_NAME))
+    if index.get('version', 0) > PROJECT_VERSION:
+        raise ValueError(f"{path} was saved by a newer version of the report generator")
+
+    market_data = MarketData(images)
+    for entry in index.get('markets', []):
+        name = entry['name']
+        market_data.add_market(name)
+        for field in MARKET_FIELDS + ['notes']:
+            market_data.set_market_data(name, field, entry.get(field, ''))
+        for field in IMAGE_FIELDS:
+            image = entry.get(field)
+            if image:
+                handle = ImageHandle(path, image['sha1'], image['width'], image['height'], image['format'],
+                                     image['size'], member=image['member'])
+                market_data.set_market_data(name, field, market_data.images.add(handle))
+        series = entry.get(SERIES_FIELD)
+        if series:
+            market_data.set_market_data(name, SERIES_FIELD, EquitySeries(path, series['sha1'], series['format'],
+                                                                         series['size'], member=series['member']))
+
+    return ReportData(index.get('strategy', {}),
+                      intro_table=index.get('intro_table'),
+                      parameters=index.get('parameters', []),
+                      market_data=market_data)
@@ -0,0 +1,96 @@
+# data/report_data.py
+import json
+import os
+
+from .market_data import MarketData
+
+STRATEGY_FIELDS = ['strategy_name', 'specific_goal', 'optimisation_method', 'target_performance']
+MARKET_FIELDS = ['timeframe', 'data_source', 'optimisation_timespan', 'out_of_sample_timespan']
+PARAMETER_FIELDS = ['name', 'description', 'default', 'start', 'step', 'end', 'best']
+IMAGE_FIELDS = ['equity_curve', 'performance_metrics']
+# Raw equity curve (.csv or .npy), metrics and the chart are derived from it when a report is built
+SERIES_FIELD = 'equity_data'
+
+class ReportData:
+    def __init__(self, strategy=None, intro_table=None, parameters=None, market_data=None):
+        strategy = strategy or {}
+        self.strategy = {field: strategy.get(field, '') for field in STRATEGY_FIELDS}
+        self.intro_table = intro_table
+        self.parameters = parameters or []
+        self.market_data = market_data if market_data is not None else MarketData()
+
+    @property
+    def strategy_name(self):
+        return self.strategy['strategy_name']
+
+    @property
+    def specific_goal(self):
+        return self.strategy['specific_goal']
+
+    @property
+    def optimisation_method(self):
+        return self.strategy['optimisation_method']
+
+    @property
+    def target_performance(self):
+        return self.strategy['target_performance']
+
+    def get_intro_table_data(self):
+        if self.intro_table is not None:
+            return self.intro_table
+        # Job specs usually leave the intro table out, it is the same market metadata
+        rows = []
+        for market, data in self.market_data.get_all_data().items():
+            rows.append([market] + [data[field] for field in MARKET_FIELDS])
+        return rows
+
+    def get_parameter_data(self):
+        return self.parameters
+
+    def get_results_data(self):
+        return self.market_data.get_all_data()
+
+    @classmethod
+    def from_tabs(cls, intro_tab, param_tab, results_tab):
+        strategy = {
+            'strategy_name': intro_tab.get_strategy_name(),
+            'specific_goal': intro_tab.get_specific_goal(),
+            'optimisation_method': intro_tab.get_optimisation_method(),
+            'target_performance': intro_tab.get_target_performance(),
+        }
+        return cls(strategy,
+                   intro_table=[list(row) for row in intro_tab.get_intro_table_data()],
+                   parameters=[list(row) for row in param_tab.get_parameter_data()],
+                   market_data=results_tab.market_data.copy())
+
+    @classmethod
+    def from_dict(cls, spec, base_dir='.'):
+        market_data = MarketData()
+        for market in spec.get('markets', []):
+            name = market['name']
+            market_data.add_market(name)
+            for field in MARKET_FIELDS + ['notes']:
+                if field in market:
+                    market_data.set_market_data(name, field, market[field])
+            for field in IMAGE_FIELDS:
+                if market.get(field):
+                    market_data.set_market_image(name, field, os.path.join(base_dir, market[field]))
+            if market.get(SERIES_FIELD):
+                market_data.set_market_equity(name, os.path.join(base_dir, market[SERIES_FIELD]))
+
+        parameters = []
+        for row in spec.get('parameters', []):
+            if isinstance(row, dict):
+                row = [row.get(field, '') for field in PARAMETER_FIELDS]
+            parameters.append(list(row))
+
+        return cls(spec.get('strategy', {}),
+                   intro_table=spec.get('intro_table'),
+                   parameters=parameters,
+                   market_data=market_data)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding='utf-8') as f:
+            spec = json.load(f)
+        return cls.from_dict(spec, base_dir=os.path.dirname(os.path.abspath(path)))
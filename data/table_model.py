@@ -0,0 +1,77 @@
+# data/table_model.py
+
+class TableModel:
+    # Values of a table stored column by column, the widget only ever shows a slice of the rows
+    def __init__(self, columns, min_rows=10):
+        self.columns = tuple(columns)
+        self.min_rows = min_rows
+        self.data = [[] for _ in self.columns]
+        self.listeners = []
+        self._pad()
+
+    def __len__(self):
+        return len(self.data[0])
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def notify_listeners(self):
+        for listener in self.listeners:
+            listener()
+
+    def _normalise(self, row):
+        values = ['' if value is None else str(value) for value in row][:len(self.columns)]
+        return values + [''] * (len(self.columns) - len(values))
+
+    def _row_is_blank(self, index):
+        return not any(column[index] for column in self.data)
+
+    def _append_blank(self):
+        for column in self.data:
+            column.append('')
+
+    def _pad(self):
+        # Always finish with an empty row to type a new entry into
+        if not len(self) or not self._row_is_blank(-1):
+            self._append_blank()
+        while len(self) < self.min_rows:
+            self._append_blank()
+
+    def _strip_trailing_blank_rows(self):
+        while len(self) and self._row_is_blank(-1):
+            for column in self.data:
+                column.pop()
+
+    def get_rows(self, start, stop):
+        # A window of rows, as used by the view
+        return [list(row) for row in zip(*(column[start:stop] for column in self.data))]
+
+    def get_value(self, index, column):
+        return self.data[column][index]
+
+    def set_value(self, index, column, value):
+        self.data[column][index] = '' if value is None else str(value)
+        self._pad()
+        self.notify_listeners()
+
+    def replace_rows(self, rows):
+        self.data = [[] for _ in self.columns]
+        self._extend(rows)
+        self._pad()
+        self.notify_listeners()
+
+    def extend(self, rows):
+        self._strip_trailing_blank_rows()
+        self._extend(rows)
+        self._pad()
+        self.notify_listeners()
+
+    def _extend(self, rows):
+        rows = [self._normalise(row) for row in rows]
+        if rows:
+            for column, values in zip(self.data, zip(*rows)):
+                column.extend(values)
+
+    def filled_rows(self):
+        # Rows with something in the first (name) column, values kept as typed
+        return [list(row) for row in zip(*self.data) if row[0]]
@@ -1,15 +1,18 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-from PIL import Image, ImageTk
-import io
+from .thumbnail_loader import ThumbnailLoader
 
 class ResultsTab:
     def __init__(self, notebook, market_data):
         self.frame = ttk.Frame(notebook)
         notebook.add(self.frame, text="Results")
         self.market_data = market_data
+        self.markets = []
+        self.dropdown_pending = False
         self.create_widgets()
+        self.thumbnails = ThumbnailLoader(self.frame)
         self.update_market_dropdown()
+        market_data.add_observer(self.on_market_change)
 
     def create_widgets(self):
         tk.Label(self.frame, text="Select Market:").grid(row=0, column=0, sticky="e", padx=5, pady=5)
@@ -20,6 +23,10 @@ class ResultsTab:
 
         tk.Button(self.frame, text="Upload Equity Curve", command=lambda: self.upload_image('equity_curve')).grid(row=1, column=0, padx=5, pady=5)
         tk.Button(self.frame, text="Upload Performance Metrics", command=lambda: self.upload_image('performance_metrics')).grid(row=1, column=1, padx=5, pady=5)
+        # Raw equity data replaces both screenshots with a chart and metrics computed at report time
+        tk.Button(self.frame, text="Import Equity Data...", command=self.import_equity_data).grid(row=1, column=2, padx=5, pady=5)
+        self.equity_data_label = tk.Label(self.frame, text="")
+        self.equity_data_label.grid(row=2, column=2, sticky="n", padx=5, pady=5)
 
         self.equity_curve_frame = tk.Frame(self.frame, width=400, height=300)
         self.equity_curve_frame.grid(row=2, column=0, columnspan=2, padx=5, pady=5)
@@ -39,6 +46,11 @@ class ResultsTab:
 
         tk.Button(self.frame, text="Save Market Data", command=self.save_market_data).grid(row=5, column=1, padx=5, pady=5)
 
+        self.image_labels = {
+            'equity_curve': self.equity_curve_label,
+            'performance_metrics': self.performance_metrics_label,
+        }
+
         self.frame.grid_rowconfigure(2, weight=1)
         self.frame.grid_rowconfigure(3, weight=1)
         self.frame.grid_columnconfigure(1, weight=1)
@@ -46,13 +58,55 @@ class ResultsTab:
     def update_market_dropdown(self, markets=None):
         if markets is None:
             markets = list(self.market_data.get_markets())
-        self.market_dropdown['values'] = markets
-        if markets and not self.market_var.get():
-            self.market_var.set(markets[0])
-
-    def on_market_change(self, action, markets):
-        if action == 'update':
-            self.update_market_dropdown(markets)
+        self.markets = list(markets)
+        self.refresh_dropdown()
+
+    def schedule_dropdown_refresh(self):
+        # A save can produce many events, the combobox is only updated once they are all in
+        if not self.dropdown_pending:
+            self.dropdown_pending = True
+            self.frame.after_idle(self.refresh_dropdown)
+
+    def refresh_dropdown(self):
+        self.dropdown_pending = False
+        self.market_dropdown['values'] = self.markets
+        if self.markets and not self.market_var.get():
+            self.market_var.set(self.markets[0])
+            self.load_market_data(None)
+
+    def on_market_change(self, event, market, detail):
+        selected = self.market_var.get()
+        if event == 'add':
+            self.markets.append(market)
+        elif event == 'remove':
+            self.markets.remove(market)
+            if market == selected:
+                self.market_var.set('')
+                self.clear_market_data()
+        elif event == 'rename':
+            self.markets[self.markets.index(market)] = detail
+            if market == selected:
+                self.market_var.set(detail)
+        elif event == 'reorder':
+            self.markets = list(detail)
+        elif event == 'reset':
+            self.markets = list(self.market_data.get_markets())
+            if selected not in self.markets:
+                self.market_var.set('')
+            self.load_market_data(None)
+        elif event == 'update' and market == selected:
+            self.on_field_change(market, detail)
+        self.schedule_dropdown_refresh()
+
+    def on_field_change(self, market, key):
+        data = self.market_data.get_market_data(market)
+        if key in self.image_labels:
+            self.load_image(market, key, data.get(key))
+        elif key == 'equity_data':
+            self.show_equity_data(data.get(key))
+        elif key == 'notes' and self.market_notes.get("1.0", tk.END).strip() != data.get('notes', ''):
+            self.market_notes.delete("1.0", tk.END)
+            self.market_notes.insert(tk.END, data.get('notes', ''))
 
     def upload_image(self, image_type):
         market = self.market_var.get()
@@ -62,23 +116,27 @@ class ResultsTab:
 
         file_path = filedialog.askopenfilename(filetypes=[("Image files", "*.png *.jpg *.jpeg *.gif *.bmp")])
         if file_path:
-            with Image.open(file_path) as image:
-                # Save original image data
-                img_byte_arr = io.BytesIO()
-                image.save(img_byte_arr, format=image.format)
-                self.market_data.set_market_data(market, image_type, img_byte_arr.getvalue())
-
-                # Create a thumbnail for display (without changing original resolution)
-                display_image = image.copy()
-                display_image.thumbnail((500, 250))  # Set the thumbnail size for preview
-                photo = ImageTk.PhotoImage(display_image)
-
-                if image_type == 'equity_curve':
-                    self.equity_curve_label.config(image=photo)
-                    self.equity_curve_label.image = photo
-                else:
-                    self.performance_metrics_label.config(image=photo)
-                    self.performance_metrics_label.image = photo
+            try:
+                # Keep a reference to the file, the thumbnail is shown when market_data reports the change
+                self.market_data.set_market_image(market, image_type, file_path)
+            except (OSError, ValueError) as e:
+                messagebox.showerror("Error", f"Could not read image: {str(e)}")
+
+    def import_equity_data(self):
+        market = self.market_var.get()
+        if not market:
+            messagebox.showerror("Error", "Please select a market first.")
+            return
+
+        file_path = filedialog.askopenfilename(filetypes=[("Equity data", "*.csv *.npy *.txt")])
+        if file_path:
+            try:
+                self.market_data.set_market_equity(market, file_path)
+            except (OSError, ValueError) as e:
+                messagebox.showerror("Error", f"Could not read equity data: {str(e)}")
+
+    def show_equity_data(self, series):
+        self.equity_data_label.config(text=f"Equity data: {series.filename}" if series else "")
 
     def save_market_data(self):
         market = self.market_var.get()
@@ -96,27 +154,53 @@ class ResultsTab:
             if data:
                 self.market_notes.delete("1.0", tk.END)
                 self.market_notes.insert(tk.END, data.get('notes', ''))
-                self.load_image(data.get('equity_curve'), self.equity_curve_label)
-                self.load_image(data.get('performance_metrics'), self.performance_metrics_label)
+                for image_type in self.image_labels:
+                    self.load_image(market, image_type, data.get(image_type))
+                self.show_equity_data(data.get('equity_data'))
+                self.prefetch_neighbours(market)
             else:
                 self.clear_market_data()
         else:
             self.clear_market_data()
 
-    def load_image(self, img_data, label):
-        if img_data:
-            image = Image.open(io.BytesIO(img_data))
-            image.thumbnail((500, 250))  # Set the display size for preview
-            photo = ImageTk.PhotoImage(image)
-            label.config(image=photo)
-            label.image = photo
+    def load_image(self, market, image_type, handle):
+        label = self.image_labels[image_type]
+        if handle:
+            label.config(image='', text='')
+            self.thumbnails.request(market, handle,
+                                    lambda photo, error: self.show_image(market, image_type, handle, photo, error))
         else:
-            label.config(image='')
+            label.config(image='', text='')
+
+    def show_image(self, market, image_type, handle, photo, error=None):
+        # The user may have moved on to another market or image while this was decoding
+        data = self.market_data.get_market_data(market)
+        if market != self.market_var.get() or not data or getattr(data.get(image_type), 'sha1', None) != handle.sha1:
+            return
+        label = self.image_labels[image_type]
+        if photo is None:
+            label.config(image='', text=f"Could not read image: {error}" if error else '')
+            label.image = None
+            return
+        label.config(image=photo, text='')
+        label.image = photo
+
+    def prefetch_neighbours(self, market):
+        markets = self.market_data.get_markets()
+        if market not in markets:
+            return
+        index = markets.index(market)
+        for neighbour in markets[max(index - 1, 0):index] + markets[index + 1:index + 2]:
+            data = self.market_data.get_market_data(neighbour)
+            for image_type in self.image_labels:
+                if data.get(image_type):
+                    self.thumbnails.request(neighbour, data[image_type])
 
     def clear_market_data(self):
         self.market_notes.delete("1.0", tk.END)
-        self.equity_curve_label.config(image='')
-        self.performance_metrics_label.config(image='')
+        self.equity_curve_label.config(image='', text='')
+        self.performance_metrics_label.config(image='', text='')
+        self.show_equity_data(None)
 
     def get_results_data(self):
         return self.market_data.get_all_data()
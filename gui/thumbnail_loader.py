@@ -0,0 +1,84 @@
+# gui/thumbnail_loader.py
+import queue
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+THUMBNAIL_SIZE = (500, 250)
+POLL_INTERVAL_MS = 20
+
+def make_thumbnail(handle, size=THUMBNAIL_SIZE):
+    # PIL is imported on first use so it does not slow down startup
+    from PIL import Image
+
+    with handle.open() as f, Image.open(f) as image:
+        # JPEGs are decoded at a reduced scale instead of full resolution
+        image.draft('RGB', size)
+        image.thumbnail(size)
+        return image
+
+class ThumbnailLoader:
+    # Thumbnails are decoded on worker threads, PhotoImages are only created on the Tk thread.
+    # Callbacks get (photo, None), or (None, error) when the image could not be read
+    def __init__(self, widget, max_entries=64, max_workers=2):
+        self.widget = widget
+        self.max_entries = max_entries
+        self._cache = OrderedDict()
+        self._pending = {}
+        self._results = queue.Queue()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='thumbnails')
+        self._polling = False
+
+    def request(self, market, handle, callback=None):
+        key = (market, handle.sha1)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            if callback:
+                callback(self._cache[key], None)
+            return
+
+        callbacks = self._pending.get(key)
+        if callbacks is not None:
+            if callback:
+                callbacks.append(callback)
+            return
+
+        self._pending[key] = [callback] if callback else []
+        self._pool.submit(self._work, key, handle)
+        if not self._polling:
+            self._polling = True
+            self.widget.after(POLL_INTERVAL_MS, self._poll)
+
+    def _work(self, key, handle):
+        image = error = None
+        try:
+            image = make_thumbnail(handle)
+        except (OSError, ValueError) as e:
+            error = e
+        finally:
+            # Always answered, or the request would stay pending and the polling never stop
+            self._results.put((key, image, error))
+
+    def _poll(self):
+        from PIL import ImageTk
+
+        while True:
+            try:
+                key, image, error = self._results.get_nowait()
+            except queue.Empty:
+                break
+            photo = ImageTk.PhotoImage(image) if image is not None else None
+            if photo is not None:
+                self._store(key, photo)
+            for callback in self._pending.pop(key, []):
+                callback(photo, error)
+
+        if self._pending:
+            self.widget.after(POLL_INTERVAL_MS, self._poll)
+        else:
+            self._polling = False
+
+    def _store(self, key, photo):
+        self._cache[key] = photo
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
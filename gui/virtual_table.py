@@ -0,0 +1,172 @@
+# gui/virtual_table.py
+import tkinter as tk
+from tkinter import ttk
+
+ROW_HEIGHT = 25
+
+class VirtualTable:
+    # A Treeview with a fixed pool of items that shows a window onto a TableModel
+    def __init__(self, parent, model, column_width=100, visible_rows=10):
+        self.model = model
+        self.offset = 0
+        self.visible_rows = visible_rows
+        self.selected = None
+
+        self.frame = ttk.Frame(parent)
+        self.tree = ttk.Treeview(self.frame, columns=model.columns, show='headings', style="Treeview",
+                                 height=visible_rows, selectmode='browse')
+        for col in model.columns:
+            self.tree.heading(col, text=col)
+            self.tree.column(col, width=column_width, anchor='center')
+        self.yscrollbar = ttk.Scrollbar(self.frame, orient='vertical', command=self.on_scroll)
+        self.xscrollbar = ttk.Scrollbar(self.frame, orient='horizontal', command=self.tree.xview)
+        self.tree.configure(xscrollcommand=self.xscrollbar.set)
+
+        self.tree.grid(row=0, column=0, sticky='nsew')
+        self.yscrollbar.grid(row=0, column=1, sticky='ns')
+        self.xscrollbar.grid(row=1, column=0, sticky='ew')
+        self.frame.grid_rowconfigure(0, weight=1)
+        self.frame.grid_columnconfigure(0, weight=1)
+
+        # Add alternating row colors
+        self.tree.tag_configure('oddrow', background='#FFFFFF')
+        self.tree.tag_configure('evenrow', background='#F0F0F0')
+
+        # What each pooled item currently shows, so unchanged rows are not sent to Tk again
+        self.items = []
+        self.shown = {}
+        self.resize_pool(visible_rows)
+
+        self.tree.bind('<Double-1>', self.on_double_click)
+        self.tree.bind('<Button-1>', self.on_click)
+        self.tree.bind('<MouseWheel>', self.on_mouse_wheel)
+        self.tree.bind('<Button-4>', lambda event: self.scroll_to(self.offset - 3))
+        self.tree.bind('<Button-5>', lambda event: self.scroll_to(self.offset + 3))
+        self.tree.bind('<Configure>', self.on_configure)
+        for key, move in (('<Up>', -1), ('<Down>', 1)):
+            self.tree.bind(key, lambda event, move=move: self.move_selection(move))
+        for key, move in (('<Prior>', -1), ('<Next>', 1)):
+            self.tree.bind(key, lambda event, move=move: self.move_selection(move * self.visible_rows))
+        self.tree.bind('<Home>', lambda event: self.select_row(0))
+        self.tree.bind('<End>', lambda event: self.select_row(len(self.model) - 1))
+
+        model.add_listener(self.refresh)
+        self.refresh()
+
+    def resize_pool(self, rows):
+        rows = max(1, rows)
+        while len(self.items) < rows:
+            self.items.append(self.tree.insert('', 'end', values=[''] * len(self.model.columns)))
+        if len(self.items) > rows:
+            self.tree.delete(*self.items[rows:])
+            for item in self.items[rows:]:
+                self.shown.pop(item, None)
+            del self.items[rows:]
+        self.visible_rows = rows
+
+    def on_configure(self, event):
+        # Show as many rows as fit, less the heading
+        rows = max(1, event.height // ROW_HEIGHT - 1)
+        if rows != self.visible_rows:
+            self.resize_pool(rows)
+            self.refresh()
+
+    def row_index(self, item):
+        if item not in self.items:
+            return None
+        index = self.offset + self.items.index(item)
+        return index if index < len(self.model) else None
+
+    def refresh(self):
+        self.offset = max(0, min(self.offset, len(self.model) - self.visible_rows))
+        rows = self.model.get_rows(self.offset, self.offset + self.visible_rows)
+        blank = [''] * len(self.model.columns)
+        for position, item in enumerate(self.items):
+            index = self.offset + position
+            if position < len(rows):
+                state = (rows[position], 'oddrow' if index % 2 else 'evenrow')
+            else:
+                state = (blank, '')
+            if self.shown.get(item) != state:
+                self.tree.item(item, values=state[0], tags=(state[1],) if state[1] else ())
+                self.shown[item] = state
+        self.update_selection()
+        self.update_scrollbar()
+
+    def update_selection(self):
+        # The selection follows the model row, not the pooled item
+        position = None if self.selected is None else self.selected - self.offset
+        if position is not None and 0 <= position < len(self.items):
+            if self.tree.selection() != (self.items[position],):
+                self.tree.selection_set(self.items[position])
+        elif self.tree.selection():
+            self.tree.selection_remove(*self.tree.selection())
+
+    def update_scrollbar(self):
+        total = max(len(self.model), 1)
+        self.yscrollbar.set(self.offset / total, min(1.0, (self.offset + self.visible_rows) / total))
+
+    def scroll_to(self, offset):
+        offset = max(0, min(offset, len(self.model) - self.visible_rows))
+        if offset != self.offset:
+            self.offset = offset
+            self.refresh()
+
+    def select_row(self, index):
+        self.selected = max(0, min(index, len(self.model) - 1))
+        if self.selected < self.offset:
+            self.scroll_to(self.selected)
+        elif self.selected >= self.offset + self.visible_rows:
+            self.scroll_to(self.selected - self.visible_rows + 1)
+        self.update_selection()
+        return 'break'
+
+    def move_selection(self, amount):
+        return self.select_row((self.offset if self.selected is None else self.selected) + amount)
+
+    def on_scroll(self, action, amount, unit=None):
+        if action == 'moveto':
+            self.scroll_to(int(float(amount) * len(self.model)))
+        elif action == 'scroll':
+            step = self.visible_rows if unit == 'pages' else 1
+            self.scroll_to(self.offset + int(amount) * step)
+
+    def on_mouse_wheel(self, event):
+        self.scroll_to(self.offset - int(event.delta / 120) * 3)
+
+    def on_click(self, event):
+        region = self.tree.identify("region", event.x, event.y)
+        if region == "cell":
+            index = self.row_index(self.tree.identify_row(event.y))
+            if index is not None:
+                self.selected = index
+                self.update_selection()
+            self.tree.focus_set()
+
+    def on_double_click(self, event):
+        item = self.tree.identify('item', event.x, event.y)
+        column = self.tree.identify('column', event.x, event.y)
+        index = self.row_index(item)
+
+        if index is not None and column:
+            col_num = int(column.split('#')[1]) - 1
+            value = self.model.get_value(index, col_num)
+
+            # Create an entry widget for editing
+            entry = ttk.Entry(self.tree, width=20)
+            entry.insert(0, value)
+            entry.select_range(0, tk.END)
+            entry.focus()
+
+            # Edits go to the model, the view is refreshed from it
+            def save_edit(event=None):
+                if entry.winfo_exists():
+                    new_value = entry.get()
+                    entry.destroy()
+                    self.model.set_value(index, col_num, new_value)
+
+            entry.bind('<Return>', save_edit)
+            entry.bind('<FocusOut>', save_edit)
+
+            bbox = self.tree.bbox(item, column)
+            entry.place(x=bbox[0], y=bbox[1], width=bbox[2])
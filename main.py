@@ -1,8 +1,27 @@
+import os
+import queue
+import shutil
+import tempfile
+import threading
 import tkinter as tk
-from tkinter import ttk
+from tkinter import ttk, filedialog, messagebox
 from gui import IntroductionTab, ParameterSetsTab, ResultsTab
-from data import MarketData
-from report import ReportGenerator
+from data import MarketData, ReportData, PROJECT_EXTENSION, load_project, save_project
+
+POLL_INTERVAL_MS = 50
+WARM_UP_DELAY_MS = 200
+
+# python-docx, lxml and PIL are only imported by the report package, which is loaded when a
+# report is generated or by the warm-up thread once the window is up
+
+def warm_template_cache():
+    from report import template_cache
+    from report.report_generator import DEFAULT_TEMPLATE
+    try:
+        template_cache.get(DEFAULT_TEMPLATE)
+    except Exception:
+        # Only a warm-up, a bad template is reported when a report is generated
+        pass
 
 class EnhancedReportGeneratorGUI:
     def __init__(self, master):
@@ -19,14 +38,161 @@ class EnhancedReportGeneratorGUI:
         self.param_tab = ParameterSetsTab(self.notebook)
         self.results_tab = ResultsTab(self.notebook, self.market_data)
 
-        self.intro_tab.add_observer(self.results_tab.on_market_change)
+        button_frame = tk.Frame(master)
+        button_frame.pack(pady=10)
+        tk.Button(button_frame, text="Open Project", command=self.open_project).pack(side=tk.LEFT, padx=5)
+        tk.Button(button_frame, text="Save Project", command=self.save_project).pack(side=tk.LEFT, padx=5)
+        self.generate_button = tk.Button(button_frame, text="Generate Report", command=self.generate_report)
+        self.generate_button.pack(side=tk.LEFT, padx=5)
+        self.compare_button = tk.Button(button_frame, text="Compare Projects...", command=self.compare_projects)
+        self.compare_button.pack(side=tk.LEFT, padx=5)
+        self.cancel_button = tk.Button(button_frame, text="Cancel", command=self.cancel_report, state=tk.DISABLED)
+        self.cancel_button.pack(side=tk.LEFT, padx=5)
+
+        self.progress_bar = ttk.Progressbar(master, mode='determinate', maximum=1.0)
+        self.progress_bar.pack(fill=tk.X, padx=10)
+        self.progress_label = tk.Label(master, text="")
+        self.progress_label.pack(pady=(0, 10))
+
+        self.report_events = queue.Queue()
+        self.cancel_event = None
+
+        self.master.after(WARM_UP_DELAY_MS, self.warm_up)
+
+    def warm_up(self):
+        # Load python-docx and parse the template while the tabs are being filled in
+        threading.Thread(target=warm_template_cache, daemon=True).start()
 
-        self.generate_button = tk.Button(master, text="Generate Report", command=self.generate_report)
-        self.generate_button.pack(pady=10)
+    def open_project(self):
+        path = filedialog.askopenfilename(filetypes=[("Report projects", f"*{PROJECT_EXTENSION}")])
+        if not path:
+            return
+
+        try:
+            report_data = load_project(path, self.market_data.images)
+        except Exception as e:
+            messagebox.showerror("Error", f"Could not open project: {str(e)}")
+            return
+
+        self.intro_tab.set_strategy_fields(report_data.strategy)
+        self.intro_tab.set_intro_table_data(report_data.get_intro_table_data())
+        self.param_tab.set_parameter_data(report_data.get_parameter_data())
+        # The results tab picks the first market again when it sees the reset
+        self.results_tab.market_var.set('')
+        self.market_data.replace_all(report_data.market_data)
+
+    def save_project(self):
+        path = filedialog.asksaveasfilename(defaultextension=PROJECT_EXTENSION,
+                                            filetypes=[("Report projects", f"*{PROJECT_EXTENSION}")])
+        if not path:
+            return
+
+        try:
+            save_project(path, ReportData.from_tabs(self.intro_tab, self.param_tab, self.results_tab))
+        except Exception as e:
+            messagebox.showerror("Error", f"Could not save project: {str(e)}")
+            return
+
+        messagebox.showinfo("Success", "Project saved successfully!")
 
     def generate_report(self):
-        report_generator = ReportGenerator(self.intro_tab, self.param_tab, self.results_tab)
-        report_generator.generate()
+        # Snapshot the tabs here, the worker thread must not touch any widget
+        self.start_report([ReportData.from_tabs(self.intro_tab, self.param_tab, self.results_tab)])
+
+    def compare_projects(self):
+        paths = filedialog.askopenfilenames(title="Choose the projects to compare",
+                                            filetypes=[("Report projects", f"*{PROJECT_EXTENSION}")])
+        if not paths:
+            return
+
+        try:
+            reports = [load_project(path, self.market_data.images) for path in paths]
+        except Exception as e:
+            messagebox.showerror("Error", f"Could not open project: {str(e)}")
+            return
+        self.start_report(reports)
+
+    def start_report(self, reports):
+        fd, temp_path = tempfile.mkstemp(suffix=".docx")
+        os.close(fd)
+
+        self.cancel_event = threading.Event()
+        self.generate_button.config(state=tk.DISABLED)
+        self.compare_button.config(state=tk.DISABLED)
+        self.cancel_button.config(state=tk.NORMAL)
+        self.progress_bar['value'] = 0
+
+        threading.Thread(target=self.render_report, args=(reports, temp_path, self.cancel_event),
+                         daemon=True).start()
+        self.master.after(POLL_INTERVAL_MS, self.poll_report)
+
+    def render_report(self, reports, temp_path, cancel_event):
+        # Imported here, off the Tk thread, in case the warm-up has not loaded it yet
+        from report import ComparisonReportGenerator, ReportCancelled, ReportGenerator
+
+        try:
+            if len(reports) == 1:
+                generator = ReportGenerator(reports[0], progress=self.on_report_progress, cancel_event=cancel_event)
+            else:
+                generator = ComparisonReportGenerator(reports, progress=self.on_report_progress,
+                                                      cancel_event=cancel_event)
+            generator.generate(temp_path)
+            self.report_events.put(('done', temp_path, None))
+        except ReportCancelled:
+            self.report_events.put(('cancelled', temp_path, None))
+        except Exception as e:
+            self.report_events.put(('error', temp_path, e))
+
+    def on_report_progress(self, done, total, message):
+        # Called on the worker thread
+        self.report_events.put(('progress', done / total if total else 0, message))
+
+    def cancel_report(self):
+        if self.cancel_event is not None:
+            self.cancel_event.set()
+            self.cancel_button.config(state=tk.DISABLED)
+            self.progress_label.config(text="Cancelling...")
+
+    def poll_report(self):
+        while True:
+            try:
+                event, value, detail = self.report_events.get_nowait()
+            except queue.Empty:
+                break
+            if event == 'progress':
+                self.progress_bar['value'] = value
+                self.progress_label.config(text=detail)
+            else:
+                self.finish_report(event, value, detail)
+                return
+        self.master.after(POLL_INTERVAL_MS, self.poll_report)
+
+    def finish_report(self, event, temp_path, error):
+        self.cancel_event = None
+        self.generate_button.config(state=tk.NORMAL)
+        self.compare_button.config(state=tk.NORMAL)
+        self.cancel_button.config(state=tk.DISABLED)
+        self.progress_bar['value'] = 1.0 if event == 'done' else 0
+        self.progress_label.config(text="")
+
+        save_path = None
+        if event == 'done':
+            save_path = filedialog.asksaveasfilename(defaultextension=".docx")
+
+        if save_path:
+            try:
+                shutil.move(temp_path, save_path)
+            except OSError as e:
+                messagebox.showerror("Error", f"Could not save the report: {str(e)}")
+                return
+            messagebox.showinfo("Success", "Report generated successfully!")
+            return
+
+        os.remove(temp_path)
+        if event == 'error':
+            messagebox.showerror("Error", f"An error occurred while generating the report: {str(error)}")
+        else:
+            messagebox.showwarning("Cancelled", "Report generation cancelled.")
 
 if __name__ == "__main__":
     root = tk.Tk()
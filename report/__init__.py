@@ -1,3 +1,14 @@
 # report/__init__.py
-from .report_generator import ReportGenerator
-from .style_manager import StyleManager
\ No newline at end of file
+from .comparison import ComparisonReportGenerator
+from .docx_writer import DocxWriter, write_docx
+from .equity import EquityAnalyser, equity_analyser
+from .fragment_cache import FragmentCache, fragment_cache
+from .image_optimiser import ImageOptimiser
+from .instrumentation import Instrumentation, NullInstrumentation
+from .metrics import compute_metrics
+from .output_cache import OutputCache
+from .renderers import HtmlRenderer, MarkdownRenderer, convert_to_pdf
+from .report_generator import OUTPUT_FORMATS, ReportCancelled, ReportGenerator
+from .report_model import ReportModel, build_comparison_model, build_report_model
+from .style_manager import StyleManager
+from .template_cache import TemplateCache, template_cache
\ No newline at end of file
@@ -0,0 +1,143 @@
+# report/batch.py
+import argparse
+import glob
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from data import ReportData
+from .comparison import ComparisonReportGenerator
+from .docx_writer import DEFAULT_COMPRESS_LEVEL
+from .image_optimiser import ImageOptimiser
+from .instrumentation import Instrumentation
+from .output_cache import DEFAULT_MAX_BYTES, OutputCache
+from .report_generator import DEFAULT_TEMPLATE, OUTPUT_FORMATS, ReportGenerator
+
+# Per worker process, so optimised images are reused by every job the worker renders
+_optimisers = {}
+_output_caches = {}
+
+def _image_optimiser(options):
+    if not options:
+        return None
+    key = tuple(sorted(options.items()))
+    if key not in _optimisers:
+        _optimisers[key] = ImageOptimiser(**options)
+    return _optimisers[key]
+
+def _output_cache(cache_dir, max_bytes):
+    if not cache_dir:
+        return None
+    key = (os.path.abspath(cache_dir), max_bytes)
+    if key not in _output_caches:
+        _output_caches[key] = OutputCache(*key)
+    return _output_caches[key]
+
+def render_job(job_path, output_dir, template_path=DEFAULT_TEMPLATE, image_options=None, timings=False,
+               profile=False, max_table_rows=None, compress_level=DEFAULT_COMPRESS_LEVEL, formats=("docx",),
+               low_memory=False, output_cache_dir=None, output_cache_bytes=DEFAULT_MAX_BYTES):
+    with open(job_path, encoding='utf-8') as f:
+        spec = json.load(f)
+    report_data = ReportData.from_dict(spec, base_dir=os.path.dirname(os.path.abspath(job_path)))
+    output_name = spec.get('output') or os.path.splitext(os.path.basename(job_path))[0] + '.docx'
+    output_stem = os.path.join(output_dir, os.path.splitext(output_name)[0])
+    outputs = {output_format: f"{output_stem}.{output_format}" for output_format in formats}
+    instrumentation = Instrumentation(write_timings=timings, profile=profile) if timings or profile else None
+    ReportGenerator(report_data, template_path, _image_optimiser(image_options),
+                    instrumentation=instrumentation, max_table_rows=max_table_rows,
+                    # Jobs already run one per process
+                    max_workers=1, compress_level=compress_level, low_memory=low_memory,
+                    output_cache=_output_cache(output_cache_dir, output_cache_bytes)).generate_formats(outputs)
+    return list(outputs.values())
+
+def render_comparison(job_paths, output_dir, output_name, template_path=DEFAULT_TEMPLATE, image_options=None,
+                      timings=False, profile=False, max_table_rows=None, compress_level=DEFAULT_COMPRESS_LEVEL,
+                      formats=("docx",), low_memory=False, output_cache_dir=None,
+                      output_cache_bytes=DEFAULT_MAX_BYTES):
+    # Every job becomes one strategy of a single document, in job order
+    reports = [ReportData.load(job_path) for job_path in job_paths]
+    output_stem = os.path.join(output_dir, os.path.splitext(output_name)[0])
+    outputs = {output_format: f"{output_stem}.{output_format}" for output_format in formats}
+    instrumentation = Instrumentation(write_timings=timings, profile=profile) if timings or profile else None
+    ComparisonReportGenerator(reports, template_path, image_optimiser=_image_optimiser(image_options),
+                              instrumentation=instrumentation, max_table_rows=max_table_rows,
+                              compress_level=compress_level, low_memory=low_memory,
+                              output_cache=_output_cache(output_cache_dir, output_cache_bytes)).generate_formats(outputs)
+    return list(outputs.values())
+
+def find_jobs(jobs_dir):
+    return sorted(glob.glob(os.path.join(jobs_dir, '*.json')))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render a directory of report job specs to .docx and other formats.")
+    parser.add_argument('jobs_dir', help="directory containing *.json job specs")
+    parser.add_argument('-o', '--output-dir', default='.', help="where to write the reports")
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count(), help="number of worker processes")
+    parser.add_argument('--template', default=DEFAULT_TEMPLATE, help="path to the .docx template")
+    parser.add_argument('--image-dpi', type=int, help="downsample images to this DPI at their 6 inch width")
+    parser.add_argument('--jpeg', action='store_true', help="convert opaque PNG images to JPEG")
+    parser.add_argument('--jpeg-quality', type=int, default=85)
+    parser.add_argument('--colours', type=int, help="quantise PNG images to this many colours")
+    parser.add_argument('--max-table-rows', type=int, help="split intro/parameter tables every N rows")
+    parser.add_argument('--compress-level', type=int, default=DEFAULT_COMPRESS_LEVEL, choices=range(10),
+                        metavar='0-9', help="deflate level for the XML parts, media is always stored")
+    parser.add_argument('--formats', default='docx',
+                        help=f"comma separated output formats out of {', '.join(OUTPUT_FORMATS)} (pdf needs LibreOffice)")
+    parser.add_argument('--compare', metavar='NAME',
+                        help="render all job specs as strategies of one comparison report called NAME")
+    parser.add_argument('--low-memory', action='store_true',
+                        help="write market sections to a temporary file as they are built, for very large reports")
+    parser.add_argument('--output-cache', metavar='DIR',
+                        help="reuse reports rendered before from identical inputs, kept in DIR")
+    parser.add_argument('--output-cache-size', type=int, default=DEFAULT_MAX_BYTES >> 20, metavar='MB',
+                        help="evict the least recently used cached reports beyond this size")
+    parser.add_argument('--timings', action='store_true', help="write <report>.timings.json next to each report")
+    parser.add_argument('--profile', action='store_true', help="write a cProfile dump <report>.prof next to each report")
+    args = parser.parse_args(argv)
+    formats = tuple(f.strip().lower() for f in args.formats.split(',') if f.strip())
+    unknown = set(formats) - set(OUTPUT_FORMATS)
+    if unknown:
+        parser.error(f"unknown format(s): {', '.join(sorted(unknown))}")
+
+    image_options = None
+    if args.image_dpi or args.jpeg or args.colours:
+        image_options = {'target_dpi': args.image_dpi, 'convert_to_jpeg': args.jpeg,
+                         'jpeg_quality': args.jpeg_quality, 'colours': args.colours}
+
+    jobs = find_jobs(args.jobs_dir)
+    if not jobs:
+        print(f"No job specs found in {args.jobs_dir}", file=sys.stderr)
+        return 1
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    if args.compare:
+        try:
+            paths = render_comparison(jobs, args.output_dir, args.compare, args.template, image_options,
+                                      args.timings, args.profile, args.max_table_rows, args.compress_level, formats,
+                                      args.low_memory, args.output_cache, args.output_cache_size << 20)
+        except Exception as e:
+            print(f"Comparison of {len(jobs)} strategies failed: {e}", file=sys.stderr)
+            return 1
+        print(f"{len(jobs)} strategies -> {', '.join(paths)}")
+        return 0
+
+    failures = 0
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        futures = {pool.submit(render_job, job, args.output_dir, args.template, image_options,
+                               args.timings, args.profile, args.max_table_rows, args.compress_level,
+                               formats, args.low_memory, args.output_cache,
+                               args.output_cache_size << 20): job for job in jobs}
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                print(f"{job} -> {', '.join(future.result())}")
+            except Exception as e:
+                failures += 1
+                print(f"{job} failed: {e}", file=sys.stderr)
+
+    print(f"{len(jobs) - failures}/{len(jobs)} reports generated")
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,72 @@
+# report/body_spool.py
+import tempfile
+import uuid
+
+from lxml import etree
+
+CHUNK_SIZE = 1 << 20
+
+class BodySpool:
+    # Body elements serialised to a temporary file as they are produced, instead of staying in the
+    # document tree until it is saved. Each run of elements is a segment with a marker that is put in
+    # the tree where they belong, DocxWriter splices the segments in at their markers
+    def __init__(self, root, spool_dir=None):
+        self.tag = root.tag
+        self.nsmap = root.nsmap
+        self.token = uuid.uuid4().hex
+        self.file = tempfile.TemporaryFile(dir=spool_dir)
+        # Per segment [marker bytes, start offset, end offset]
+        self.segments = []
+        self.bytes_written = 0
+
+    def segment(self):
+        # Starts a new segment, later writes go to it. Returns the marker to put in the tree
+        marker = etree.ProcessingInstruction('report-body', f"{self.token}-{len(self.segments)}")
+        self.segments.append([etree.tostring(marker), self.bytes_written, self.bytes_written])
+        return marker
+
+    def add(self, elements):
+        marker = self.segment()
+        self.write(elements)
+        return marker
+
+    def write(self, elements):
+        if not elements:
+            return
+        # Serialised inside an element with the document's namespaces, so they are not declared again on
+        # every element and the bytes are the same as in a document saved the usual way
+        wrapper = etree.Element(self.tag, nsmap=self.nsmap)
+        wrapper.extend(elements)
+        xml = etree.tostring(wrapper, encoding='UTF-8')
+        body = xml[xml.index(b'>') + 1:xml.rindex(b'</')]
+        self.file.seek(0, 2)
+        self.file.write(body)
+        self.bytes_written += len(body)
+        self.segments[-1][2] = self.bytes_written
+
+    def splice(self, xml, f):
+        # Writes the serialised part to f with every segment in place of its marker. Can be called
+        # once per output, e.g. for the docx and the copy converted to PDF
+        positions = sorted((xml.find(marker), marker, start, end) for marker, start, end in self.segments)
+        written = 0
+        for position, marker, start, end in positions:
+            if position < 0:
+                # The marker was removed from the tree along with its segment
+                continue
+            f.write(xml[written:position])
+            self._copy(f, start, end)
+            written = position + len(marker)
+        f.write(xml[written:])
+
+    def _copy(self, f, start, end):
+        self.file.seek(start)
+        remaining = end - start
+        while remaining:
+            chunk = self.file.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                raise EOFError("Body spool is shorter than its segments")
+            f.write(chunk)
+            remaining -= len(chunk)
+
+    def close(self):
+        self.file.close()
@@ -0,0 +1,21 @@
+# report/comparison.py
+from .report_generator import DEFAULT_TEMPLATE, ReportGenerator, report_inputs
+from .report_model import build_comparison_model
+
+class ComparisonReportGenerator(ReportGenerator):
+    # One document for several strategies. The template is loaded and styled once, and an image
+    # or equity series used by more than one strategy is processed and embedded once
+    def __init__(self, reports, template_path=DEFAULT_TEMPLATE, **options):
+        if not reports:
+            raise ValueError("A comparison needs at least one strategy")
+        super().__init__(reports[0], template_path, **options)
+        self.reports = reports
+
+    def create_model(self):
+        return build_comparison_model(self.reports, self.optimised_images, self.equity)
+
+    def results(self):
+        return [market for data in self.reports for market in data.get_results_data().values()]
+
+    def cache_inputs(self):
+        return [report_inputs(data) for data in self.reports]
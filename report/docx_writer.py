@@ -0,0 +1,98 @@
+# report/docx_writer.py
+import shutil
+import zipfile
+
+from docx.opc.constants import CONTENT_TYPE as CT
+from docx.opc.packuri import CONTENT_TYPES_URI, PACKAGE_URI
+from docx.opc.part import XmlPart
+from docx.opc.pkgwriter import _ContentTypesItem
+from lxml import etree
+
+DEFAULT_COMPRESS_LEVEL = 6
+CHUNK_SIZE = 1 << 20
+
+# Deflating these again costs time and saves next to nothing
+COMPRESSED_CONTENT_TYPES = {CT.PNG, CT.JPEG, CT.GIF, 'image/jpg'}
+
+def _is_seekable(target):
+    if isinstance(target, str):
+        return True
+    try:
+        return target.seekable()
+    except AttributeError:
+        return False
+
+def _compression(content_type, seekable, compress_level):
+    # Stored entries written to a stream would need a data descriptor, which not every reader
+    # accepts, so media is only stored when the target can be seeked back into
+    if content_type in COMPRESSED_CONTENT_TYPES and seekable:
+        return zipfile.ZIP_STORED, None
+    return zipfile.ZIP_DEFLATED, compress_level
+
+def _zip_info(name, compress_type):
+    info = zipfile.ZipInfo(name, date_time=(1980, 1, 1, 0, 0, 0))
+    info.compress_type = compress_type
+    info.external_attr = 0o600 << 16
+    return info
+
+class DocxWriter:
+    # Writes a python-docx package part by part straight into the zip, without the
+    # in-memory blob python-docx builds for every part before deflating it
+    def __init__(self, compress_level=DEFAULT_COMPRESS_LEVEL):
+        self.compress_level = compress_level
+        self.stored_entries = 0
+        self.deflated_entries = 0
+
+    def write(self, document, target):
+        package = document.part.package
+        parts = list(package.iter_parts())
+        for part in parts:
+            part.before_marshal()
+
+        seekable = _is_seekable(target)
+        with zipfile.ZipFile(target, 'w', zipfile.ZIP_DEFLATED, compresslevel=self.compress_level) as archive:
+            self._write_bytes(archive, CONTENT_TYPES_URI.membername, _ContentTypesItem.from_parts(parts).blob, CT.XML,
+                              seekable)
+            self._write_bytes(archive, PACKAGE_URI.rels_uri.membername, package.rels.xml, CT.OPC_RELATIONSHIPS,
+                              seekable)
+            for part in parts:
+                self._write_part(archive, part, seekable)
+                if len(part.rels):
+                    self._write_bytes(archive, part.partname.rels_uri.membername, part.rels.xml,
+                                      CT.OPC_RELATIONSHIPS, seekable)
+        return target
+
+    def _open(self, archive, name, content_type, seekable):
+        compress_type, compress_level = _compression(content_type, seekable, self.compress_level)
+        info = _zip_info(name, compress_type)
+        if compress_level is not None:
+            info._compresslevel = compress_level
+        if compress_type == zipfile.ZIP_STORED:
+            self.stored_entries += 1
+        else:
+            self.deflated_entries += 1
+        return archive.open(info, 'w')
+
+    def _write_bytes(self, archive, name, blob, content_type, seekable):
+        with self._open(archive, name, content_type, seekable) as f:
+            f.write(blob)
+
+    def _write_part(self, archive, part, seekable):
+        name = part.partname.membername
+        with self._open(archive, name, part.content_type, seekable) as f:
+            handle = getattr(part, 'handle', None)
+            spool = getattr(part, 'body_spool', None)
+            if spool is not None:
+                # The tree without the spooled elements is small, they go in where their markers are
+                spool.splice(etree.tostring(part.element, encoding='UTF-8', xml_declaration=True, standalone=True), f)
+            elif isinstance(part, XmlPart):
+                # Serialised straight into the zip entry, same bytes as part.blob
+                etree.ElementTree(part.element).write(f, encoding='UTF-8', xml_declaration=True, standalone=True)
+            elif handle is not None:
+                with handle.open() as source:
+                    shutil.copyfileobj(source, f, CHUNK_SIZE)
+            else:
+                f.write(part.blob)
+
+def write_docx(document, target, compress_level=DEFAULT_COMPRESS_LEVEL):
+    return DocxWriter(compress_level).write(document, target)
@@ -0,0 +1,131 @@
+# report/equity.py
+import functools
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from .metrics import compute_metrics, metric_rows, periods_per_year
+from .scratch_dir import ScratchDir
+
+# 6 inches at 300 dpi. Bump CHART_VERSION when the drawing changes so cached charts are redrawn
+CHART_SIZE = (1800, 900)
+CHART_VERSION = 1
+CHART_MARGIN = (150, 40, 40, 60)  # left, top, right, bottom
+GRID_LINES = 5
+# Palette indexes, the chart is drawn straight into a palette image so the PNG stays small
+WHITE, BLACK, GRID, LINE, DRAWDOWN = range(5)
+PALETTE = [255, 255, 255, 0, 0, 0, 210, 210, 210, 31, 86, 160, 232, 160, 160]
+# Mostly flat colour, a fast level compresses nearly as well
+PNG_COMPRESS_LEVEL = 1
+
+@functools.lru_cache(maxsize=None)
+def _font(size):
+    try:
+        return ImageFont.load_default(size)
+    except TypeError:
+        # Pillow before 10.1 only has the small bitmap font
+        return ImageFont.load_default()
+
+def _column_ranges(values, columns):
+    # Min and max of the bars falling into each pixel column, widened to meet the previous
+    # column so the line stays connected
+    edges = (np.arange(columns, dtype=np.int64) * values.size) // columns
+    lows = np.minimum.reduceat(values, edges)
+    highs = np.maximum.reduceat(values, edges)
+    lasts = values[np.append(edges[1:], values.size) - 1]
+    np.minimum(lows[1:], lasts[:-1], out=lows[1:])
+    np.maximum(highs[1:], lasts[:-1], out=highs[1:])
+    return lows, highs
+
+def render_equity_chart(values, path, size=CHART_SIZE):
+    # The curve and the drawdown shading are rasterised with numpy, one pixel column at a time
+    # would mean thousands of draw calls. Only the grid labels and frame go through ImageDraw
+    width, height = size
+    bars = values.size
+    left, top, right, bottom = CHART_MARGIN
+    plot_width = width - left - right
+    plot_height = height - top - bottom
+
+    lowest = float(values.min())
+    highest = float(values.max())
+    if highest == lowest:
+        highest = lowest + 1
+
+    def y(value):
+        return (highest - value) / (highest - lowest) * (plot_height - 1)
+
+    pixels = np.full((height, width), WHITE, dtype=np.uint8)
+    plot = pixels[top:top + plot_height, left:left + plot_width]
+    grid = [lowest + (highest - lowest) * i / GRID_LINES for i in range(GRID_LINES + 1)]
+    plot[np.round(y(np.array(grid))).astype(np.int64), :] = GRID
+
+    if values.size < plot_width:
+        # Fewer bars than pixels, the line is interpolated between them
+        values = np.interp(np.linspace(0, values.size - 1, plot_width), np.arange(values.size), values)
+    lows, highs = _column_ranges(values, plot_width)
+    low_y = np.round(y(lows))
+    high_y = np.round(y(highs))
+    peak_y = np.round(y(np.maximum.accumulate(highs)))
+    rows = np.arange(plot_height)[:, None]
+    # The distance to the running high is the drawdown
+    plot[(rows >= peak_y) & (rows <= low_y)] = DRAWDOWN
+    line = (rows >= high_y) & (rows <= low_y)
+    line[:, 1:] |= line[:, :-1]
+    plot[line] = LINE
+
+    image = Image.fromarray(pixels, 'P')
+    image.putpalette(PALETTE)
+    draw = ImageDraw.Draw(image)
+    font = _font(24)
+    step = (highest - lowest) / GRID_LINES
+    decimals = 0 if step >= 1 else min(6, math.ceil(-math.log10(step)))
+    for value in grid:
+        draw.text((left - 12, top + y(value)), f"{value:,.{decimals}f}", fill=BLACK, font=font, anchor='rm')
+    draw.rectangle([left, top, width - right, height - bottom], outline=BLACK)
+    draw.text((left, height - bottom + 12), "1", fill=BLACK, font=font, anchor='ma')
+    draw.text((left + plot_width / 2, height - bottom + 12), "Bar", fill=BLACK, font=font, anchor='ma')
+    draw.text((width - right, height - bottom + 12), f"{bars:,}", fill=BLACK, font=font, anchor='ra')
+    image.save(path, compress_level=PNG_COMPRESS_LEVEL)
+    return path
+
+class EquityAnalyser:
+    # Metrics and a chart per equity series. Both are cached in the image store by the series'
+    # content hash, so a series is only read again when its file changes
+    def __init__(self, chart_size=CHART_SIZE, max_workers=None, cache_dir=None):
+        self.chart_size = chart_size
+        self.max_workers = max_workers
+        self.output_dir = ScratchDir(cache_dir, 'report-charts-')
+
+    def analyse(self, series, timeframe, store):
+        # Returns (metric table rows, chart handle)
+        values = []
+
+        def load():
+            if not values:
+                values.append(series.values())
+            return values[0]
+
+        annual_periods = periods_per_year(timeframe)
+        metrics = store.processed(series, ('metrics', annual_periods),
+                                  lambda series: compute_metrics(load(), annual_periods))
+        chart = store.processed(series, ('equity_chart', self.chart_size, CHART_VERSION),
+                                lambda series: self._chart(series, load(), store))
+        return metric_rows(metrics), chart
+
+    def analyse_all(self, items, store):
+        # items are (series, timeframe) pairs, returns {(series sha1, timeframe): (rows, chart)}
+        unique = list({(series.sha1, timeframe): (series, timeframe) for series, timeframe in items}.values())
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            results = pool.map(lambda item: self.analyse(item[0], item[1], store), unique)
+            return {(series.sha1, timeframe): result for (series, timeframe), result in zip(unique, results)}
+
+    def _chart(self, series, values, store):
+        path = os.path.join(self.output_dir.get(), f"{series.sha1}-{self.chart_size[0]}x{self.chart_size[1]}.png")
+        render_equity_chart(values, path, self.chart_size)
+        return store.add_file(path)
+
+# Shared by every report in the process, like the template cache
+equity_analyser = EquityAnalyser()
@@ -0,0 +1,96 @@
+# report/fragment_cache.py
+import copy
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from docx.oxml.ns import qn
+
+def fingerprint(*inputs):
+    # Stable across runs and processes, handles are identified by their content hash
+    def default(value):
+        sha1 = getattr(value, 'sha1', None)
+        return sha1 if sha1 is not None else repr(value)
+    text = json.dumps(inputs, default=default, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+class Fragment:
+    # Detached copies of rendered body elements, pictures point at image hashes instead of rIds
+    def __init__(self, elements, handles=None):
+        self.elements = elements
+        self.handles = handles or {}
+        # XML nodes held, what the cache is bounded by
+        self.size = sum(1 for element in elements for _ in element.iter())
+
+    @classmethod
+    def capture(cls, elements, embedder):
+        elements = [copy.deepcopy(element) for element in elements]
+        handles = {}
+        for element in elements:
+            for blip in element.iter(qn('a:blip')):
+                handle = embedder.handle_for(blip.get(qn('r:embed')))
+                handles[handle.sha1] = handle
+                blip.set(qn('r:embed'), handle.sha1)
+        return cls(elements, handles)
+
+    def stamp(self, embedder):
+        # Fresh copies for one document, with its own rIds and drawing ids
+        elements = [copy.deepcopy(element) for element in self.elements]
+        for element in elements:
+            for blip in element.iter(qn('a:blip')):
+                # Pictures that came with the template keep the template's rId
+                handle = self.handles.get(blip.get(qn('r:embed')))
+                if handle is not None:
+                    blip.set(qn('r:embed'), embedder.relate(handle))
+            for doc_pr in element.iter(qn('wp:docPr')):
+                shape_id = embedder.next_shape_id()
+                doc_pr.set('id', str(shape_id))
+                doc_pr.set('name', f"Picture {shape_id}")
+                embedder.picture_count += 1
+        return elements
+
+class FragmentCache:
+    # Least recently used fragments are dropped past max_entries or max_nodes. A 5000 row table is
+    # around 200k nodes, so the node limit keeps a few large tables rather than one per job
+    def __init__(self, max_entries=1024, max_nodes=500_000):
+        self.max_entries = max_entries
+        self.max_nodes = max_nodes
+        self.hits = 0
+        self.misses = 0
+        self.nodes = 0
+        self._fragments = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            fragment = self._fragments.get(key)
+            if fragment is None:
+                self.misses += 1
+                return None
+            self._fragments.move_to_end(key)
+            self.hits += 1
+            return fragment
+
+    def put(self, key, fragment):
+        if fragment.size > self.max_nodes:
+            return
+        with self._lock:
+            previous = self._fragments.pop(key, None)
+            if previous is not None:
+                self.nodes -= previous.size
+            self._fragments[key] = fragment
+            self.nodes += fragment.size
+            while len(self._fragments) > self.max_entries or self.nodes > self.max_nodes:
+                _, evicted = self._fragments.popitem(last=False)
+                self.nodes -= evicted.size
+
+    def clear(self):
+        with self._lock:
+            self._fragments.clear()
+            self.nodes = 0
+            self.hits = 0
+            self.misses = 0
+
+# Lives as long as the process, so repeated renders from the GUI reuse unchanged sections
+fragment_cache = FragmentCache()
@@ -0,0 +1,82 @@
+# report/image_optimiser.py
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+from data import ImageHandle
+from .scratch_dir import ScratchDir
+
+class ImageOptimiser:
+    def __init__(self, target_dpi=150, width_inches=6, convert_to_jpeg=False, jpeg_quality=85,
+                 colours=None, max_workers=None, cache_dir=None):
+        self.target_dpi = target_dpi
+        self.width_inches = width_inches
+        self.convert_to_jpeg = convert_to_jpeg
+        self.jpeg_quality = jpeg_quality
+        self.colours = colours
+        self.max_workers = max_workers
+        self.output_dir = ScratchDir(cache_dir, 'report-images-')
+
+    @property
+    def key(self):
+        return ('optimised', self.target_dpi, self.width_inches, self.convert_to_jpeg, self.jpeg_quality, self.colours)
+
+    @property
+    def target_width(self):
+        return int(round(self.width_inches * self.target_dpi)) if self.target_dpi else None
+
+    def optimise(self, handle, store):
+        return store.processed(handle, self.key, self._process)
+
+    def optimise_all(self, handles, store):
+        # Returns {original sha1: handle to embed}, unchanged images map to themselves
+        unique = list({handle.sha1: handle for handle in handles}.values())
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            results = pool.map(lambda handle: self.optimise(handle, store), unique)
+            return {handle.sha1: result for handle, result in zip(unique, results)}
+
+    def _process(self, handle):
+        target_width = self.target_width
+        resize = target_width is not None and handle.width > target_width
+        with handle.open() as f, Image.open(f) as image:
+            has_alpha = image.mode in ('RGBA', 'LA') or 'transparency' in image.info
+            # Only opaque PNGs are converted, JPEG has no alpha channel
+            to_jpeg = self.convert_to_jpeg and handle.format == 'PNG' and not has_alpha
+            quantise = bool(self.colours) and handle.format == 'PNG' and not to_jpeg
+            if not (resize or to_jpeg or quantise):
+                return handle
+
+            if resize:
+                target_height = max(1, int(round(handle.height * target_width / handle.width)))
+                # JPEG can decode at a reduced scale straight away
+                image.draft('RGB', (target_width, target_height))
+                if image.mode not in ('RGB', 'RGBA', 'L'):
+                    image = image.convert('RGBA' if has_alpha else 'RGB')
+                image = image.resize((target_width, target_height), Image.LANCZOS)
+
+            output_format = 'JPEG' if to_jpeg else handle.format
+            options = {'dpi': (self.target_dpi, self.target_dpi)} if self.target_dpi else {}
+            if to_jpeg:
+                image = image.convert('RGB')
+                options.update(quality=self.jpeg_quality, optimize=True)
+            elif quantise:
+                # Chosen by the converted mode, MEDIANCUT can't quantise RGBA
+                method = Image.Quantize.FASTOCTREE if has_alpha else Image.Quantize.MEDIANCUT
+                image = image.convert('RGBA' if has_alpha else 'RGB').quantize(colors=self.colours, method=method)
+                options.update(optimize=True)
+            elif output_format == 'PNG':
+                options.update(optimize=True)
+
+            ext = 'jpg' if output_format == 'JPEG' else handle.ext
+            options_digest = hashlib.sha1(repr(self.key).encode()).hexdigest()[:12]
+            name = f"{handle.sha1}-{options_digest}.{ext}"
+            path = os.path.join(self.output_dir.get(), name)
+            image.save(path, format=output_format, **options)
+
+        optimised = ImageHandle.from_path(path)
+        # Recompression alone is not worth it if the file did not get smaller
+        if not resize and optimised.size >= handle.size:
+            return handle
+        return optimised
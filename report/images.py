@@ -0,0 +1,86 @@
+# report/images.py
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+from docx.opc.packuri import PackURI
+from docx.oxml.shape import CT_Inline
+from docx.parts.image import ImagePart
+from docx.shared import Emu
+
+class HandleImagePart(ImagePart):
+    # The file behind the handle is only read when the package is written
+    def __init__(self, partname, handle):
+        super().__init__(partname, handle.content_type, None)
+        self.handle = handle
+
+    @property
+    def blob(self):
+        return self.handle.read()
+
+    @property
+    def sha1(self):
+        return self.handle.sha1
+
+    @property
+    def filename(self):
+        return self.handle.filename
+
+class ImageEmbedder:
+    # One image part per distinct content hash, every further use only adds a drawing
+    def __init__(self, document, store):
+        self.document_part = document.part
+        self.store = store
+        self._rIds = {}
+        self._handles = {}
+        self.embedded_bytes = 0
+        self.picture_count = 0
+        # python-docx finds free ids, rIds and part numbers by scanning everything that exists on every call,
+        # so they are counted here from a single scan instead
+        self._shape_id = self.document_part.next_id - 1
+        self._used_numbers = {image_part.partname.idx for image_part in self.document_part.package.image_parts}
+        self._number = 0
+        rId_numbers = [int(rId[3:]) for rId in self.document_part.rels if rId.startswith('rId') and rId[3:].isdigit()]
+        self._rId_number = max(rId_numbers, default=0)
+
+    @property
+    def part_count(self):
+        return len(self._rIds)
+
+    def next_shape_id(self):
+        self._shape_id += 1
+        return self._shape_id
+
+    def _new_image_part(self, handle):
+        # Numbered like python-docx does, unique regardless of extension
+        self._number += 1
+        while self._number in self._used_numbers:
+            self._number += 1
+        partname = PackURI(f"/word/media/image{self._number}.{handle.ext}")
+        image_part = HandleImagePart(partname, handle)
+        self.document_part.package.image_parts.append(image_part)
+        return image_part
+
+    def relate(self, handle):
+        handle = self.store.add(handle)
+        rId = self._rIds.get(handle.sha1)
+        if rId is None:
+            image_part = self._new_image_part(handle)
+            self._rId_number += 1
+            rId = f"rId{self._rId_number}"
+            self.document_part.load_rel(RT.IMAGE, image_part, rId)
+            self._rIds[handle.sha1] = rId
+            self._handles[rId] = handle
+            self.embedded_bytes += handle.size
+        return rId
+
+    def handle_for(self, rId):
+        return self._handles[rId]
+
+    def add_picture(self, run, handle, width):
+        rId = self.relate(handle)
+        handle = self._handles[rId]
+        self.picture_count += 1
+
+        # Scale from the header dimensions, python-docx would decode the blob for this
+        height = Emu(int(round(width * handle.height / handle.width)))
+        inline = CT_Inline.new_pic_inline(self.next_shape_id(), rId, handle.filename, width, height)
+        run._r.add_drawing(inline)
+        return handle
@@ -0,0 +1,105 @@
+# report/instrumentation.py
+import contextlib
+import cProfile
+import json
+import os
+import threading
+import time
+
+# Set to 1 to write <report>.timings.json / <report>.prof next to every generated report
+TIMINGS_ENV = 'REPORT_TIMINGS'
+PROFILE_ENV = 'REPORT_PROFILE'
+
+class Instrumentation:
+    enabled = True
+
+    def __init__(self, write_timings=False, profile=False):
+        self.write_timings = write_timings
+        self.profile = profile
+        self.spans = []
+        self.counters = {}
+        # Per thread, worker threads start from the path they were given
+        self._local = threading.local()
+        self._profiler = None
+        self._started = time.perf_counter()
+
+    def _stack(self):
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    def current_path(self):
+        stack = self._stack()
+        return stack[-1] if stack else None
+
+    @contextlib.contextmanager
+    def span(self, name, parent=None, **attributes):
+        # parent nests a span started on another thread under the path of the work it belongs to
+        stack = self._stack()
+        base = stack[-1] if stack else parent
+        path = f"{base}/{name}" if base else name
+        stack.append(path)
+        start = time.perf_counter()
+        try:
+            yield attributes
+        finally:
+            stack.pop()
+            self.spans.append(dict(attributes, name=name, path=path, seconds=time.perf_counter() - start))
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def start(self):
+        self._started = time.perf_counter()
+        if self.profile:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    def finish(self, output_path=None):
+        if self._profiler is not None:
+            self._profiler.disable()
+        self.counters['total_seconds'] = time.perf_counter() - self._started
+        if output_path and isinstance(output_path, str) and os.path.exists(output_path):
+            self.counters['output_bytes'] = os.path.getsize(output_path)
+            if self.write_timings:
+                with open(output_path + '.timings.json', 'w', encoding='utf-8') as f:
+                    f.write(self.to_json())
+            if self._profiler is not None:
+                self._profiler.dump_stats(output_path + '.prof')
+
+    def to_dict(self):
+        return {'spans': list(self.spans), 'counters': dict(self.counters)}
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), indent=1)
+
+class NullInstrumentation:
+    enabled = False
+
+    def span(self, name, parent=None, **attributes):
+        return contextlib.nullcontext(attributes)
+
+    def current_path(self):
+        return None
+
+    def count(self, name, amount=1):
+        pass
+
+    def start(self):
+        pass
+
+    def finish(self, output_path=None):
+        pass
+
+    def to_dict(self):
+        return {'spans': [], 'counters': {}}
+
+    def to_json(self):
+        return json.dumps(self.to_dict())
+
+def from_environment():
+    write_timings = os.environ.get(TIMINGS_ENV, '') not in ('', '0')
+    profile = os.environ.get(PROFILE_ENV, '') not in ('', '0')
+    if write_timings or profile:
+        return Instrumentation(write_timings=write_timings, profile=profile)
+    return NullInstrumentation()
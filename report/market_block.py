@@ -0,0 +1,191 @@
+# report/market_block.py
+import copy
+from xml.sax.saxutils import escape, quoteattr
+
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls, qn
+from docx.shared import Inches, Twips
+from .fragment_cache import Fragment
+from .instrumentation import NullInstrumentation
+from .placeholders import W_P, paragraph_text, path_to, replace_in_paragraph, resolve
+from .report_model import IMAGE_FIELDS, ImageBlock, TableBlock
+from .table_builder import INVALID_XML_CHARS, table_xml, text_xml
+
+PICTURE_URI = "http://schemas.openxmlformats.org/drawingml/2006/picture"
+
+# A template can lay out the block itself between these two paragraphs
+BLOCK_START = "[market_block]"
+BLOCK_END = "[/market_block]"
+NOTES_SLOT = "[market_notes]"
+# Paragraphs holding nothing but one of these are replaced by the market's notes, pictures or
+# the metrics table derived from its equity data
+SLOTS = {NOTES_SLOT} | {f"[{field}]" for field in IMAGE_FIELDS}
+# Replaced wherever they appear in the text
+TEXT_TOKENS = ("[market_title]", "[market_name]")
+
+# Used when the template does not define a block
+DEFAULT_LAYOUT = (
+    '<w:p>{heading}<w:r><w:t xml:space="preserve">[market_title]</w:t></w:r></w:p>'
+    '<w:p><w:r><w:t>[market_notes]</w:t></w:r></w:p>'
+    '<w:p><w:r><w:t>[equity_curve]</w:t></w:r></w:p>'
+    '<w:p><w:r><w:t>[performance_metrics]</w:t></w:r></w:p>'
+    '<w:p/>'
+)
+
+W_PPR = qn('w:pPr')
+W_TC = qn('w:tc')
+W_TCW = qn('w:tcW')
+
+def _picture_xml(handle, width):
+    # Same drawing python-docx writes for add_picture. r:embed holds the image hash and the
+    # drawing id is 0 until the fragment is stamped into a document
+    width = int(width)
+    height = int(round(width * handle.height / handle.width))
+    return (
+        '<w:p><w:r><w:drawing><wp:inline>'
+        f'<wp:extent cx="{width}" cy="{height}"/>'
+        '<wp:docPr id="0" name="Picture 0"/>'
+        '<wp:cNvGraphicFramePr><a:graphicFrameLocks noChangeAspect="1"/></wp:cNvGraphicFramePr>'
+        f'<a:graphic><a:graphicData uri="{PICTURE_URI}"><pic:pic>'
+        f'<pic:nvPicPr><pic:cNvPr id="0" name={quoteattr(handle.filename)}/><pic:cNvPicPr/></pic:nvPicPr>'
+        f'<pic:blipFill><a:blip r:embed="{handle.sha1}"/><a:stretch><a:fillRect/></a:stretch></pic:blipFill>'
+        f'<pic:spPr><a:xfrm><a:off x="0" y="0"/><a:ext cx="{width}" cy="{height}"/></a:xfrm>'
+        '<a:prstGeom prst="rect"/></pic:spPr>'
+        '</pic:pic></a:graphicData></a:graphic></wp:inline></w:drawing></w:r></w:p>'
+    )
+
+def _parse(xml):
+    return list(parse_xml(f'<w:body {nsdecls("w", "wp", "a", "pic", "r")}>{xml}</w:body>'))
+
+def _cell_width(paragraph):
+    # Pictures in a table cell are kept to the cell's width, when it has a fixed one
+    cell = paragraph.getparent()
+    if cell is None or cell.tag != W_TC:
+        return None
+    width = cell.find(f"{qn('w:tcPr')}/{W_TCW}")
+    if width is None or width.get(qn('w:type')) != 'dxa':
+        return None
+    return Twips(int(width.get(qn('w:w'))))
+
+def _slot_content(slot, xml):
+    # The slot's paragraph formatting carries over to whatever replaces it
+    elements = _parse(xml) if xml else []
+    properties = slot.find(W_PPR)
+    if properties is not None:
+        for element in elements:
+            if element.tag == W_P:
+                element.insert(0, copy.deepcopy(properties))
+    return elements
+
+def _replace_slot(slot, elements):
+    for element in reversed(elements):
+        slot.addnext(element)
+    parent = slot.getparent()
+    if elements or parent.tag != W_TC or len(parent.findall(W_P)) > 1:
+        parent.remove(slot)
+    else:
+        # A table cell needs at least one paragraph
+        for child in list(slot):
+            if child.tag != W_PPR:
+                slot.remove(child)
+
+class MarketBlock:
+    # The layout of one market's results, compiled once per template. Filling it copies the
+    # layout and swaps its slots for the market's notes and pictures
+    def __init__(self, elements, table_style_id=None, table_width=Inches(6)):
+        self.elements = elements
+        self.table_style_id = table_style_id
+        self.table_width = table_width
+        # Per top level element, its slot paragraphs as (path, token, max picture width) and the
+        # paths to paragraphs with text tokens
+        self.slots = []
+        self.text_paragraphs = []
+        for element in elements:
+            slots = []
+            text_paragraphs = []
+            paragraphs = [element] if element.tag == W_P else element.iter(W_P)
+            for paragraph in paragraphs:
+                text = paragraph_text(paragraph)
+                if text.strip() in SLOTS:
+                    slots.append((path_to(element, paragraph), text.strip(), _cell_width(paragraph)))
+                elif any(token in text for token in TEXT_TOKENS):
+                    text_paragraphs.append(path_to(element, paragraph))
+            self.slots.append(slots)
+            self.text_paragraphs.append(text_paragraphs)
+
+    @classmethod
+    def default(cls, heading_style_id, table_style_id=None, table_width=Inches(6)):
+        heading = f'<w:pPr><w:pStyle w:val="{escape(heading_style_id)}"/></w:pPr>' if heading_style_id else ''
+        return cls(_parse(DEFAULT_LAYOUT.format(heading=heading)), table_style_id, table_width)
+
+    @classmethod
+    def extract(cls, document, table_style_id=None, table_width=Inches(6)):
+        # Takes the block definition out of the template body, None if there is none
+        body = document.element.body
+        start = end = None
+        for child in body.iterchildren(W_P):
+            text = paragraph_text(child).strip()
+            if start is None and text == BLOCK_START:
+                start = child
+            elif start is not None and text == BLOCK_END:
+                end = child
+                break
+        if end is None:
+            return None
+
+        elements = []
+        element = start.getnext()
+        while element is not end:
+            elements.append(element)
+            element = element.getnext()
+        for element in [start, *elements, end]:
+            body.remove(element)
+        return cls(elements, table_style_id, table_width)
+
+    def fill(self, section, span=NullInstrumentation().span):
+        # Builds one market without touching the document, so markets can be filled on
+        # several threads at once. span times each picture
+        text = {"[market_title]": section.title, "[market_name]": section.name}
+        text = {token: INVALID_XML_CHARS.sub('', str(value)) for token, value in text.items()}
+        slot_blocks = {}
+        handles = {}
+        for block in section.blocks:
+            if isinstance(block, ImageBlock):
+                handles[block.handle.sha1] = block.handle
+                slot_blocks.setdefault(f"[{block.name}]", []).append(block)
+            elif isinstance(block, TableBlock):
+                slot_blocks.setdefault(f"[{block.name}]", []).append(block)
+            else:
+                slot_blocks.setdefault(NOTES_SLOT, []).append(block)
+
+        elements = []
+        for element, slots, text_paragraphs in zip(self.elements, self.slots, self.text_paragraphs):
+            if slots and slots[0][0] == ():
+                # The element is a slot itself
+                elements.extend(_slot_content(element, self._slot_xml(slot_blocks.get(slots[0][1], []), None, span)))
+                continue
+            element = copy.deepcopy(element)
+            # Resolved before anything moves
+            slot_paragraphs = [(resolve(element, path), token, max_width) for path, token, max_width in slots]
+            for paragraph in [resolve(element, path) for path in text_paragraphs]:
+                for token, value in text.items():
+                    replace_in_paragraph(paragraph, token, value)
+            for paragraph, token, max_width in slot_paragraphs:
+                xml = self._slot_xml(slot_blocks.get(token, []), max_width, span)
+                _replace_slot(paragraph, _slot_content(paragraph, xml))
+            elements.append(element)
+        return Fragment(elements, handles)
+
+    def _slot_xml(self, blocks, max_width, span):
+        parts = []
+        for block in blocks:
+            if isinstance(block, ImageBlock):
+                with span("image", sha1=block.handle.sha1, bytes=block.handle.size):
+                    width = Inches(block.width_inches)
+                    parts.append(_picture_xml(block.handle, min(width, max_width) if max_width else width))
+            elif isinstance(block, TableBlock):
+                parts.append(table_xml(block.headers, block.rows, self.table_style_id,
+                                        max_width or self.table_width, True))
+            else:
+                parts.append(text_xml(block.text) + '<w:p/>')
+        return ''.join(parts)
@@ -0,0 +1,115 @@
+# report/metrics.py
+import math
+import re
+
+import numpy as np
+
+TRADING_DAYS = 252
+
+# Bar sizes like 15m, 1h, 4H, 1d, D, 1w, 1mo, or unit first as in MetaTrader, M15, H1, D1, W1, MN1
+_TIMEFRAME = re.compile(r'^(\d*)\s*([a-z]+)$')
+_TIMEFRAME_UNIT_FIRST = re.compile(r'^([a-z]+)\s*(\d+)$')
+# Intraday bars assume a 24 hour session on every trading day, as in forex and futures
+_BARS_PER_YEAR = {
+    'm': TRADING_DAYS * 24 * 60, 'min': TRADING_DAYS * 24 * 60, 'minute': TRADING_DAYS * 24 * 60,
+    'h': TRADING_DAYS * 24, 'hr': TRADING_DAYS * 24, 'hour': TRADING_DAYS * 24,
+    'd': TRADING_DAYS, 'day': TRADING_DAYS, 'daily': TRADING_DAYS,
+    'w': 52, 'wk': 52, 'week': 52, 'weekly': 52,
+    'mo': 12, 'mn': 12, 'month': 12, 'monthly': 12,
+}
+
+METRICS = [
+    ('net_profit', "Net Profit", '{:,.2f}'),
+    ('total_return', "Total Return", '{:.2%}'),
+    ('max_drawdown', "Max Drawdown", '{:,.2f}'),
+    ('max_drawdown_pct', "Max Drawdown %", '{:.2%}'),
+    ('longest_drawdown', "Longest Drawdown (bars)", '{:,}'),
+    ('sharpe', "Sharpe Ratio", '{:.2f}'),
+    ('sortino', "Sortino Ratio", '{:.2f}'),
+    ('profit_factor', "Profit Factor", '{:.2f}'),
+    ('recovery_factor', "Recovery Factor", '{:.2f}'),
+    ('winning_bars', "Winning Bars", '{:.1%}'),
+    ('bars', "Bars", '{:,}'),
+]
+
+def periods_per_year(timeframe):
+    # No timeframe counts as daily, one that can't be read is an error rather than a wrong annualisation
+    text = timeframe.strip() if timeframe else ''
+    if not text:
+        return TRADING_DAYS
+    match = _TIMEFRAME.match(text.lower())
+    if match is not None:
+        count, unit = match.groups()
+        if unit == 'm' and text.endswith('M'):
+            # 1M is a month, 1m a minute
+            unit = 'mo'
+    else:
+        # M15 is a minute timeframe, MN1 a month
+        match = _TIMEFRAME_UNIT_FIRST.match(text.lower())
+        unit, count = match.groups() if match is not None else (None, None)
+    bars = (_BARS_PER_YEAR.get(unit) or _BARS_PER_YEAR.get(unit.rstrip('s'))) if unit else None
+    if bars is None or (count and int(count) == 0):
+        raise ValueError(f"Unknown timeframe {timeframe!r}, use e.g. 15m, 1h, 1d, 1w, 1M or M15, H1, D1")
+    return bars / (int(count) if count else 1)
+
+def compute_metrics(equity, periods_per_year=TRADING_DAYS):
+    # equity is the account value (or cumulative P&L) at the close of every bar. Trades are not
+    # known, so profit factor and winning bars are bar by bar. Millions of bars are common, so
+    # every pass works in place in one of three arrays rather than allocating a temporary each
+    equity = np.asarray(equity, dtype=np.float64)
+    if equity.size < 2:
+        raise ValueError("An equity curve needs at least two values")
+    start = float(equity[0])
+    end = float(equity[-1])
+    net_profit = end - start
+    positive = bool(equity.min() > 0)
+    work = np.empty(equity.size)
+
+    pnl = np.diff(equity)
+    bars = pnl.size
+    moves = np.count_nonzero(pnl)
+    gains = np.maximum(pnl, 0, out=work[:bars])
+    winning = np.count_nonzero(gains)
+    gross_profit = gains.sum()
+    gross_loss = gross_profit - pnl.sum()
+
+    # Cumulative P&L starting at zero has no percentage returns, ratios use the P&L itself
+    returns = np.divide(pnl, equity[:-1], out=pnl) if positive else pnl
+    mean = returns.mean()
+    deviations = np.subtract(returns, mean, out=work[:bars])
+    std = math.sqrt(np.dot(deviations, deviations) / (bars - 1)) if bars > 1 else 0.0
+    downside_returns = np.minimum(returns, 0, out=work[:bars])
+    downside = math.sqrt(np.dot(downside_returns, downside_returns) / bars)
+
+    peaks = np.maximum.accumulate(equity)
+    max_drawdown_pct = 1 - np.divide(equity, peaks, out=work).min() if positive else math.nan
+    drawdown = np.subtract(equity, peaks, out=peaks)
+    max_drawdown = 0.0 - drawdown.min()
+    # Bars between two new highs, the last stretch runs to the end of the data
+    highs = np.flatnonzero(drawdown == 0)
+    longest_drawdown = int(max(np.diff(highs).max(initial=1), equity.size - highs[-1])) - 1
+
+    annualise = math.sqrt(periods_per_year)
+    return {
+        'net_profit': net_profit,
+        'total_return': end / start - 1 if positive else math.nan,
+        'max_drawdown': float(max_drawdown),
+        'max_drawdown_pct': float(max_drawdown_pct),
+        'longest_drawdown': longest_drawdown,
+        'sharpe': float(mean / std * annualise) if std > 0 else math.nan,
+        'sortino': float(mean / downside * annualise) if downside > 0 else math.nan,
+        'profit_factor': float(gross_profit / gross_loss) if gross_loss > 0 else math.inf,
+        'recovery_factor': float(net_profit / max_drawdown) if max_drawdown > 0 else math.inf,
+        'winning_bars': float(winning / moves) if moves else math.nan,
+        'bars': int(equity.size),
+    }
+
+def _format(value, fmt):
+    if isinstance(value, float) and math.isnan(value):
+        return "n/a"
+    if isinstance(value, float) and math.isinf(value):
+        return "∞" if value > 0 else "-∞"
+    return fmt.format(value)
+
+def metric_rows(metrics):
+    return [[label, _format(metrics[key], fmt)] for key, label, fmt in METRICS]
@@ -0,0 +1,123 @@
+# report/output_cache.py
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+DEFAULT_MAX_BYTES = 1 << 30
+# Bump when a change to the generator changes the output for the same inputs, stale entries are then never hit
+OUTPUT_VERSION = 1
+CHUNK_SIZE = 1 << 20
+
+class OutputCache:
+    # Finished reports on disk, named by the fingerprint of everything that went into them. A hit is copied
+    # out without rendering. The least recently used entries are removed once the directory grows past
+    # max_bytes. Several processes can share the directory, entries are written to a temporary file first
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def get(self, key, target):
+        # Copies the entry to target (a path or a writable file object), False if there is none
+        path = self.path(key)
+        try:
+            source = open(path, 'rb')
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return False
+        with source:
+            # The modification time is the last use, eviction goes by it
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                # Evicted by another process since it was opened, the open file is still complete
+                pass
+            if isinstance(target, str):
+                with open(target, 'wb') as f:
+                    shutil.copyfileobj(source, f, CHUNK_SIZE)
+            else:
+                shutil.copyfileobj(source, target, CHUNK_SIZE)
+        with self._lock:
+            self.hits += 1
+        return True
+
+    def put(self, key, path):
+        size = os.path.getsize(path)
+        if size > self.max_bytes:
+            return False
+        fd, temp_path = tempfile.mkstemp(prefix='.tmp-', dir=self.cache_dir)
+        try:
+            with os.fdopen(fd, 'wb') as f, open(path, 'rb') as source:
+                shutil.copyfileobj(source, f, CHUNK_SIZE)
+            os.replace(temp_path, self.path(key))
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        with self._lock:
+            self.stores += 1
+            self._evict()
+        return True
+
+    def entries(self):
+        # (last use, size, path) of every entry, oldest first
+        entries = []
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.name.startswith('.') or not entry.is_file():
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    # Evicted by another process meanwhile
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return sorted(entries)
+
+    def _evict(self):
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+                self.evictions += 1
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def stats(self):
+        entries = self.entries()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'stores': self.stores,
+                'evictions': self.evictions,
+                'entries': len(entries),
+                'bytes': sum(size for _, size, _ in entries),
+                'max_bytes': self.max_bytes,
+                'oldest_entry_age': time.time() - entries[0][0] if entries else None,
+            }
+
+    def clear(self):
+        with self._lock:
+            for _, _, path in self.entries():
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+            self.hits = self.misses = self.stores = self.evictions = 0
@@ -0,0 +1,154 @@
+# report/placeholders.py
+import re
+from bisect import bisect_right
+
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
+
+PLACEHOLDER_PATTERN = re.compile(r'\[/?[A-Za-z0-9_]+\]')
+
+W_P = qn('w:p')
+W_R = qn('w:r')
+W_T = qn('w:t')
+W_HYPERLINK = qn('w:hyperlink')
+W_RPR = qn('w:rPr')
+XML_SPACE = qn('xml:space')
+
+def _text_elements(paragraph):
+    # Only the paragraph's own runs, not paragraphs nested inside text boxes
+    texts = []
+    for child in paragraph:
+        if child.tag == W_R:
+            texts.extend(child.iterchildren(W_T))
+        elif child.tag == W_HYPERLINK:
+            for run in child.iterchildren(W_R):
+                texts.extend(run.iterchildren(W_T))
+    return texts
+
+def paragraph_text(paragraph):
+    return ''.join(t.text or '' for t in _text_elements(paragraph))
+
+def path_to(root, element):
+    path = []
+    while element is not root:
+        parent = element.getparent()
+        path.append(parent.index(element))
+        element = parent
+    return tuple(reversed(path))
+
+def resolve(root, path):
+    element = root
+    for index in path:
+        element = element[index]
+    return element
+
+def _set_text(t, text):
+    t.text = text
+    t.set(XML_SPACE, 'preserve')
+
+def _clear_text(t):
+    # Drop runs that only held part of the placeholder
+    run = t.getparent()
+    run.remove(t)
+    if all(child.tag == W_RPR for child in run):
+        run.getparent().remove(run)
+
+def _write_replacement(t, head, replacement, tail):
+    # Line breaks become w:br siblings inside the same run so the run keeps its formatting
+    lines = replacement.split('\n')
+    lines[-1] += tail
+    _set_text(t, head + lines[0])
+    anchor = t
+    for line in lines[1:]:
+        br = OxmlElement('w:br')
+        anchor.addnext(br)
+        new_t = OxmlElement('w:t')
+        _set_text(new_t, line)
+        br.addnext(new_t)
+        anchor = new_t
+
+def replace_in_paragraph(paragraph, token, replacement):
+    texts = _text_elements(paragraph)
+    offsets = []
+    position = 0
+    for t in texts:
+        offsets.append(position)
+        position += len(t.text or '')
+    full_text = ''.join(t.text or '' for t in texts)
+
+    starts = [match.start() for match in re.finditer(re.escape(token), full_text)]
+    # Work backwards so earlier offsets stay valid
+    for start in reversed(starts):
+        end = start + len(token)
+        first = bisect_right(offsets, start) - 1
+        last = bisect_right(offsets, end - 1) - 1
+        first_text = texts[first].text or ''
+        last_text = texts[last].text or ''
+        head = first_text[:start - offsets[first]]
+        tail = last_text[end - offsets[last]:]
+        if first == last:
+            _write_replacement(texts[first], head, replacement, tail)
+        else:
+            _write_replacement(texts[first], head, replacement, '')
+            for t in texts[first + 1:last]:
+                _clear_text(t)
+            if tail:
+                _set_text(texts[last], tail)
+            else:
+                _clear_text(texts[last])
+
+class PlaceholderIndex:
+    def __init__(self, locations):
+        self.locations = locations
+
+    @classmethod
+    def build(cls, document):
+        body = document.element.body
+        locations = {}
+        for paragraph in body.iter(W_P):
+            text = paragraph_text(paragraph)
+            if '[' not in text:
+                continue
+            path = None
+            for token in PLACEHOLDER_PATTERN.findall(text):
+                path = path or path_to(body, paragraph)
+                paths = locations.setdefault(token, [])
+                if path not in paths:
+                    paths.append(path)
+        return cls(locations)
+
+    def bind(self, document):
+        body = document.element.body
+        return Placeholders({token: [resolve(body, path) for path in paths]
+                             for token, paths in self.locations.items()})
+
+class Placeholders:
+    def __init__(self, paragraphs):
+        self._paragraphs = paragraphs
+
+    def __contains__(self, token):
+        return bool(self._paragraphs.get(token))
+
+    def paragraphs(self, token):
+        return self._paragraphs.get(token, [])
+
+    def first(self, token):
+        paragraphs = self.paragraphs(token)
+        return paragraphs[0] if paragraphs else None
+
+    def replace_text(self, token, replacement):
+        for paragraph in self.paragraphs(token):
+            replace_in_paragraph(paragraph, token, replacement)
+
+    def replace_with_elements(self, token, elements):
+        paragraph = self.first(token)
+        if paragraph is not None:
+            for element in reversed(elements):
+                paragraph.addnext(element)
+            self.remove(token)
+
+    def remove(self, token):
+        paragraph = self.first(token)
+        if paragraph is not None:
+            paragraph.getparent().remove(paragraph)
+            self._paragraphs[token] = self.paragraphs(token)[1:]
@@ -0,0 +1,183 @@
+# report/renderers.py
+import base64
+import html
+import os
+import pathlib
+import re
+import shutil
+import subprocess
+import tempfile
+from urllib.parse import quote
+
+from .report_model import ImageBlock, TableBlock
+
+# Base64 works on 3 byte groups, so chunks of a multiple of 3 encode independently
+BASE64_CHUNK = 3 << 18
+
+STYLESHEET = """
+body { font-family: Arial, sans-serif; font-size: 12pt; max-width: 60em; margin: 2em auto; padding: 0 1em; color: #000; }
+h1 { font-size: 18pt; } h2 { font-size: 16pt; }
+table { border-collapse: collapse; margin: 1em 0; }
+th, td { border: 1px solid #000; padding: 0.2em 0.5em; text-align: center; }
+img { max-width: 100%; height: auto; display: block; margin: 1em 0; }
+"""
+
+def _paragraphs(text):
+    # Blank lines separate paragraphs, single newlines are line breaks
+    return [paragraph.strip('\n').split('\n') for paragraph in text.strip('\n').split('\n\n') if paragraph.strip()]
+
+# Images are only turned into data URIs once they scroll into view
+LAZY_IMAGES_SCRIPT = """
+(function () {
+  function load(img) {
+    var data = document.getElementById('image-' + img.dataset.image);
+    img.src = 'data:' + data.dataset.type + ';base64,' + data.textContent;
+  }
+  var images = document.querySelectorAll('img[data-image]');
+  if (!('IntersectionObserver' in window)) { images.forEach(load); return; }
+  var observer = new IntersectionObserver(function (entries) {
+    entries.forEach(function (entry) {
+      if (entry.isIntersecting) { load(entry.target); observer.unobserve(entry.target); }
+    });
+  }, {rootMargin: '200px'});
+  images.forEach(function (img) { observer.observe(img); });
+})();
+"""
+
+class HtmlRenderer:
+    # One standalone file. Each distinct image is embedded once as base64 at the end of the page
+    # and only decoded when it scrolls into view
+    def __init__(self, model):
+        self.model = model
+
+    def write(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('<!DOCTYPE html>\n<html lang="en">\n<head>\n<meta charset="utf-8">\n')
+            f.write(f'<title>{html.escape(self.model.title)}</title>\n<style>{STYLESHEET}</style>\n</head>\n<body>\n')
+            f.write(f'<h1 class="title">{html.escape(self.model.title)} Optimisation Report</h1>\n')
+            for section in self.model.sections:
+                self.write_section(f, section)
+            self.write_image_data(f)
+            f.write(f'<script>{LAZY_IMAGES_SCRIPT}</script>\n</body>\n</html>\n')
+        return path
+
+    def write_section(self, f, section):
+        level = min(section.level, 5) + 1
+        f.write(f'<section id="{html.escape(section.key)}">\n<h{level}>{html.escape(section.title)}</h{level}>\n')
+        for block in section.blocks:
+            if isinstance(block, TableBlock):
+                self.write_table(f, block)
+            elif isinstance(block, ImageBlock):
+                self.write_image(f, block)
+            else:
+                for lines in _paragraphs(block.text):
+                    f.write('<p>' + '<br>\n'.join(html.escape(line) for line in lines) + '</p>\n')
+        for child in section.children:
+            self.write_section(f, child)
+        f.write('</section>\n')
+
+    def write_table(self, f, block):
+        f.write('<table>\n<thead><tr>')
+        f.write(''.join(f'<th>{html.escape(str(header))}</th>' for header in block.headers))
+        f.write('</tr></thead>\n<tbody>\n')
+        for row in block.rows:
+            f.write('<tr>' + ''.join(f'<td>{html.escape(str(value))}</td>' for value in row) + '</tr>\n')
+        f.write('</tbody>\n</table>\n')
+
+    def write_image(self, f, block):
+        handle = block.handle
+        width = int(round(block.width_inches * 96))
+        height = int(round(width * handle.height / handle.width))
+        f.write(f'<img data-image="{handle.sha1}" width="{width}" height="{height}" alt="{html.escape(block.alt)}">\n')
+
+    def write_image_data(self, f):
+        handles = {block.handle.sha1: block.handle for block in self.model.images()}
+        for sha1, handle in handles.items():
+            f.write(f'<script type="text/plain" id="image-{sha1}" data-type="{handle.content_type}">')
+            with handle.open() as source:
+                for chunk in iter(lambda: source.read(BASE64_CHUNK), b''):
+                    f.write(base64.b64encode(chunk).decode('ascii'))
+            f.write('</script>\n')
+
+# Markup anywhere in a line, and what only means something at the start of one (headings, lists, rules)
+_MARKDOWN_INLINE = re.compile(r'([\\`*_\[\]<>|~])')
+_MARKDOWN_LINE_START = re.compile(r'^(\s*)(?=[#+-](\s|$)|[=-]+\s*$)', re.M)
+_MARKDOWN_NUMBERED = re.compile(r'^(\s*\d+)(?=[.)](\s|$))', re.M)
+
+def _markdown_inline(value):
+    return _MARKDOWN_INLINE.sub(r'\\\1', str(value))
+
+def _markdown_text(value):
+    # What html.escape is to the HTML page, text stays text
+    text = _MARKDOWN_LINE_START.sub(r'\1\\', _markdown_inline(value))
+    return _MARKDOWN_NUMBERED.sub(r'\1\\', text)
+
+def _markdown_cell(value):
+    # A cell can't start a block, only inline markup and the column separator matter
+    return _markdown_inline(value).replace('\n', '<br>')
+
+class MarkdownRenderer:
+    # Images are copied once per content hash into a folder next to the .md file
+    def __init__(self, model):
+        self.model = model
+
+    def write(self, path):
+        stem = os.path.splitext(os.path.basename(path))[0]
+        self.image_dir = f"{stem}_images"
+        self.image_path = os.path.join(os.path.dirname(os.path.abspath(path)), self.image_dir)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(f"# {_markdown_text(self.model.title)} Optimisation Report\n\n")
+            for section in self.model.sections:
+                self.write_section(f, section)
+        return path
+
+    def write_section(self, f, section):
+        f.write(f"{'#' * min(section.level + 1, 6)} {_markdown_text(section.title)}\n\n")
+        for block in section.blocks:
+            if isinstance(block, TableBlock):
+                self.write_table(f, block)
+            elif isinstance(block, ImageBlock):
+                # The folder is named after the page, which may have spaces or brackets in it
+                link = quote(f"{self.image_dir}/{self.copy_image(block.handle)}")
+                f.write(f"![{_markdown_text(block.alt)}]({link})\n\n")
+            else:
+                for lines in _paragraphs(block.text):
+                    f.write('  \n'.join(_markdown_text(line.strip()) for line in lines) + '\n\n')
+        for child in section.children:
+            self.write_section(f, child)
+
+    def write_table(self, f, block):
+        f.write('| ' + ' | '.join(_markdown_cell(header) for header in block.headers) + ' |\n')
+        f.write('|' + '---|' * len(block.headers) + '\n')
+        for row in block.rows:
+            f.write('| ' + ' | '.join(_markdown_cell(value) for value in row) + ' |\n')
+        f.write('\n')
+
+    def copy_image(self, handle):
+        name = f"{handle.sha1}.{handle.ext}"
+        target = os.path.join(self.image_path, name)
+        if not os.path.exists(target):
+            os.makedirs(self.image_path, exist_ok=True)
+            with handle.open() as source, open(target, 'wb') as f:
+                shutil.copyfileobj(source, f, 1 << 20)
+        return name
+
+def find_pdf_converter():
+    return shutil.which('soffice') or shutil.which('libreoffice')
+
+def convert_to_pdf(docx_path, pdf_path, timeout=300):
+    # Uses a local LibreOffice, nothing leaves the machine
+    converter = find_pdf_converter()
+    if converter is None:
+        raise RuntimeError("PDF output needs LibreOffice (soffice) on the PATH")
+    with tempfile.TemporaryDirectory(prefix='report-pdf-') as out_dir:
+        # A private profile, so a running LibreOffice instance does not swallow the conversion
+        profile = pathlib.Path(out_dir, 'profile').as_uri()
+        subprocess.run([converter, f'-env:UserInstallation={profile}', '--headless', '--convert-to', 'pdf',
+                        '--outdir', out_dir, docx_path], check=True, timeout=timeout,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        converted = os.path.join(out_dir, os.path.splitext(os.path.basename(docx_path))[0] + '.pdf')
+        shutil.move(converted, pdf_path)
+    return pdf_path
+
+RENDERERS = {'html': HtmlRenderer, 'md': MarkdownRenderer}
@@ -1,146 +1,393 @@
-from docx import Document
-from docx.shared import Inches, Pt
+from docx.shared import Pt
 from docx.oxml.ns import qn
 from docx.enum.style import WD_STYLE_TYPE
 from docx.enum.text import WD_ALIGN_PARAGRAPH
-from tkinter import filedialog, messagebox
-import io
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from .body_spool import BodySpool
+from .docx_writer import DEFAULT_COMPRESS_LEVEL, DocxWriter
+from .equity import CHART_VERSION, equity_analyser as shared_equity_analyser
+from .fragment_cache import Fragment, fingerprint, fragment_cache as shared_fragment_cache
+from .images import ImageEmbedder
+from .instrumentation import from_environment
+from .output_cache import OUTPUT_VERSION
+from .renderers import RENDERERS, convert_to_pdf
+from .report_model import IMAGE_FIELDS, SERIES_FIELD, TableBlock, build_report_model
 from .style_manager import StyleManager
+from .table_builder import TABLE_STYLE, build_paragraph, build_table
+from .template_cache import template_cache
+
+DEFAULT_TEMPLATE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "template.docx")
+# In the order they are written, PDF is converted from the docx
+OUTPUT_FORMATS = ("docx", "html", "md", "pdf")
+# Single file formats, HTML inlines its images but Markdown copies them to a folder next to the page
+CACHED_FORMATS = ("docx", "html", "pdf")
+# Markets built and held at once in low memory mode
+LOW_MEMORY_BATCH = 32
+
+class ReportCancelled(Exception):
+    pass
+
+def _insert_after(previous, elements):
+    for element in elements:
+        previous.addnext(element)
+        previous = element
+    return previous
+
+def report_inputs(report_data):
+    return {
+        'strategy': report_data.strategy,
+        'intro_table': report_data.get_intro_table_data(),
+        'parameters': report_data.get_parameter_data(),
+        # In report order, handles and equity series stand in for their content hash
+        'markets': list(report_data.get_results_data().items()),
+    }
 
 class ReportGenerator:
-    def __init__(self, intro_tab, param_tab, results_tab):
-        self.intro_tab = intro_tab
-        self.param_tab = param_tab
-        self.results_tab = results_tab
+    def __init__(self, report_data, template_path=DEFAULT_TEMPLATE, image_optimiser=None, progress=None,
+                 cancel_event=None, instrumentation=None, max_table_rows=None, fragment_cache=None,
+                 max_workers=None, compress_level=DEFAULT_COMPRESS_LEVEL, equity_analyser=None, low_memory=False,
+                 output_cache=None):
+        self.data = report_data
+        self.template_path = template_path
+        self.image_optimiser = image_optimiser
+        self.max_table_rows = max_table_rows
+        # Threads used to build market sections, 1 builds them in turn
+        self.max_workers = max_workers
+        self.compress_level = compress_level
+        # Market sections go to a temporary file as they are built rather than into the document
+        # tree, so memory stays flat however many markets there are. Such a document can only be
+        # saved with DocxWriter
+        self.low_memory = low_memory
+        self.body_spool = None
+        # Finished reports by the fingerprint of their inputs, an OutputCache or None
+        self.output_cache = output_cache
+        self.optimised_images = {}
+        self.equity_analyser = equity_analyser if equity_analyser is not None else shared_equity_analyser
+        # Metric rows and chart per (equity series hash, timeframe)
+        self.equity = {}
+        self.model = None
+        self.progress = progress
+        self.cancel_event = cancel_event
+        self.instrumentation = instrumentation if instrumentation is not None else from_environment()
+        self.fragment_cache = fragment_cache if fragment_cache is not None else shared_fragment_cache
+        self.template_digest = None
+        self.steps_done = 0
+        self.steps_total = 0
         self.style_manager = None
+        self.placeholders = None
+        self.template = None
+        self.images = None
+
+    def generate(self, output_path):
+        # output_path can also be a writable file object, e.g. a socket or pipe
+        return self.generate_formats({"docx": output_path})["docx"]
+
+    def generate_formats(self, outputs):
+        # outputs maps formats in OUTPUT_FORMATS to paths. Images are prepared and the report
+        # model is built once, however many formats are written from it
+        unknown = set(outputs) - set(OUTPUT_FORMATS)
+        if unknown:
+            raise ValueError(f"Unknown output format(s): {', '.join(sorted(unknown))}")
 
-    def generate(self):
+        self.instrumentation.start()
+        self.steps_done = 0
+        # Reports rendered before with the same inputs are copied from the output cache
+        keys = {}
+        if self.output_cache is not None:
+            with self.instrumentation.span("output_cache"):
+                for output_format in [f for f in CACHED_FORMATS if f in outputs]:
+                    keys[output_format] = self.output_key(output_format)
+                cached = [f for f in keys if self.output_cache.get(keys[f], outputs[f])]
+            self.instrumentation.count("output_cache_hits", len(cached))
+            self.instrumentation.count("output_cache_misses", len(keys) - len(cached))
+            pending = {f: target for f, target in outputs.items() if f not in cached}
+            if not pending:
+                self.steps_total = 1
+                self.advance("Copied from cache")
+                self.instrumentation.finish(outputs.get("docx", next(iter(outputs.values()), None)))
+                return outputs
+        else:
+            pending = dict(outputs)
+        needs_document = "docx" in pending or "pdf" in pending
+
+        self.steps_total = 1 + len(pending) + (4 + self.market_count() if needs_document else 0)
+        span = self.instrumentation.span
         try:
-            doc = Document("template.docx")
+            # In low memory mode the document is spooled to a temporary file from the market phase on,
+            # it is closed however the run ends
+            self.build_model()
+            doc = self.build_document() if needs_document else None
+            with tempfile.TemporaryDirectory(prefix='report-') as work_dir:
+                docx_path = outputs.get("docx")
+                for output_format in [f for f in OUTPUT_FORMATS if f in pending]:
+                    target = pending[output_format]
+                    key = keys.get(output_format)
+                    # A stream can't be read back for the cache, the report is written to a file first
+                    path = target
+                    if key is not None and not isinstance(target, str):
+                        path = os.path.join(work_dir, f"cached.{output_format}")
+                    self.advance("Saving report" if output_format == "docx" else f"Writing {output_format.upper()}")
+                    with span("save", format=output_format):
+                        if output_format == "docx":
+                            self.save_document(doc, path)
+                            docx_path = path
+                        elif output_format == "pdf":
+                            if not isinstance(docx_path, str):
+                                docx_path = os.path.join(work_dir, "report.docx")
+                                self.save_document(doc, docx_path)
+                            convert_to_pdf(docx_path, path)
+                        else:
+                            RENDERERS[output_format](self.model).write(path)
+                    if key is not None:
+                        with span("output_cache_store", format=output_format):
+                            self.output_cache.put(key, path)
+                            if path is not target:
+                                with open(path, 'rb') as f:
+                                    shutil.copyfileobj(f, target)
+        finally:
+            if self.body_spool is not None:
+                self.body_spool.close()
+                self.body_spool = None
+
+        self.instrumentation.finish(outputs.get("docx", next(iter(outputs.values()), None)))
+        return outputs
+
+    def output_key(self, output_format):
+        # Everything the output depends on. Images and equity data count by content, so renaming or
+        # moving a file still hits. Thread count and low memory mode do not change the output
+        optimiser = self.image_optimiser.key if self.image_optimiser is not None else None
+        return fingerprint("output", OUTPUT_VERSION, output_format, type(self).__name__,
+                           template_cache.digest(self.template_path), StyleManager.STYLES, TABLE_STYLE,
+                           self.max_table_rows, self.compress_level, optimiser,
+                           self.equity_analyser.chart_size, CHART_VERSION, self.cache_inputs())
+
+    def cache_inputs(self):
+        return [report_inputs(self.data)]
+
+    def build_model(self):
+        if self.model is None:
+            self.advance("Preparing images")
+            with self.instrumentation.span("prepare_images"):
+                self.prepare_images()
+            with self.instrumentation.span("equity"):
+                self.prepare_equity()
+            with self.instrumentation.span("model"):
+                self.model = self.create_model()
+        return self.model
+
+    def create_model(self):
+        return build_report_model(self.data, self.optimised_images, self.equity)
+
+    def results(self):
+        # The data of every market in the report
+        return list(self.data.get_results_data().values())
+
+    def market_count(self):
+        return len(self.results())
+
+    def image_store(self):
+        return self.data.market_data.images
+
+    def build_document(self):
+        span = self.instrumentation.span
+
+        self.advance("Loading template")
+        with span("template"):
+            # Styles are applied once when the template is cached
+            with span("cache"):
+                self.template = template_cache.get(self.template_path)
+                self.template_digest = self.template.digest
+            with span("clone"):
+                doc = self.template.clone()
+                self.placeholders = self.template.placeholders.bind(doc)
             self.style_manager = StyleManager(doc)
-            self.style_manager.apply_styles()
+            self.images = ImageEmbedder(doc, self.image_store())
+            if self.low_memory:
+                self.body_spool = BodySpool(doc.element)
+                doc.part.body_spool = self.body_spool
 
+        self.advance("Introduction")
+        with span("introduction"):
             self.add_introduction_section(doc)
+        self.advance("Parameter sets")
+        with span("parameter_sets", rows=len(self.model.section("parameter_sets").blocks[0].rows)):
             self.add_parameter_sets_section(doc)
+        with span("results", markets=self.market_count()):
             self.add_results_section(doc)
+        self.advance("Disclaimer")
+        with span("disclaimer"):
             self.add_disclaimer_section(doc)
 
-            self.save_document(doc)
+        self.instrumentation.count("image_parts", self.images.part_count)
+        self.instrumentation.count("pictures", self.images.picture_count)
+        self.instrumentation.count("embedded_image_bytes", self.images.embedded_bytes)
+        if self.body_spool is not None:
+            self.instrumentation.count("spooled_bytes", self.body_spool.bytes_written)
+        return doc
 
-        except Exception as e:
-            messagebox.showerror("Error", f"An error occurred while generating the report: {str(e)}")
+    def advance(self, message):
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise ReportCancelled()
+        if self.progress is not None:
+            self.progress(self.steps_done, self.steps_total, message)
+        self.steps_done += 1
 
-    def replace_placeholder(self, doc, placeholder, replacement):
-        for paragraph in doc.paragraphs:
-            if placeholder in paragraph.text:
-                paragraph.text = paragraph.text.replace(placeholder, replacement)
+    def prepare_images(self):
+        if self.image_optimiser is None:
+            return
+        handles = [data[field] for data in self.results() for field in IMAGE_FIELDS if data[field]]
+        self.optimised_images = self.image_optimiser.optimise_all(handles, self.image_store())
 
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    for paragraph in cell.paragraphs:
-                        if placeholder in paragraph.text:
-                            paragraph.text = paragraph.text.replace(placeholder, replacement)
+    def prepare_equity(self):
+        items = [(data[SERIES_FIELD], data["timeframe"]) for data in self.results() if data.get(SERIES_FIELD)]
+        if items:
+            self.equity = self.equity_analyser.analyse_all(items, self.image_store())
+            self.instrumentation.count("equity_series", len(self.equity))
 
-    def add_introduction_section(self, doc):
-        
-        # TODO: Make points align left. Looks weird aligned middle.
-        
-        intro_text = f"""
+    def render_fragment(self, key, render):
+        # Sections whose inputs have been rendered before are copied from the cache
+        fragment = self.fragment_cache.get(key)
+        if fragment is not None:
+            self.instrumentation.count("fragment_hits")
+            return fragment.stamp(self.images)
+        self.instrumentation.count("fragment_misses")
+        elements = render()
+        if not self.low_memory:
+            self.fragment_cache.put(key, Fragment.capture(elements, self.images))
+        return elements
 
-This report presents the optimisation results for {self.intro_tab.get_strategy_name()}, focusing on enhancing its performance through parameter tuning. Our analysis aimed to {self.intro_tab.get_specific_goal()}.
+    def render_table(self, doc, table):
+        key = fingerprint(table.name, self.template_digest, self.max_table_rows, table.headers, table.rows)
+        return self.render_fragment(key, lambda: build_table(doc, table.headers, table.rows,
+                                                             max_rows=self.max_table_rows))
 
-Key Points:
-• Optimisation Method: {self.intro_tab.get_optimisation_method()}
-• Target Performance Metric: {self.intro_tab.get_target_performance()}
-• Data Range: [brief description of the data used, e.g., "5 years of historical data (2018-2023)"]
+    def render_blocks(self, doc, blocks):
+        elements = []
+        for block in blocks:
+            if isinstance(block, TableBlock):
+                elements.extend(self.render_table(doc, block))
+            else:
+                elements.append(build_paragraph(block.text, self.style_manager.style_id(block.style or "Normal")))
+        return elements
 
-Sections 2.0 and 3.0 provide detailed insights into the optimisation parameters and resulting performance metrics, respectively.
+    def replace_placeholder(self, doc, placeholder, replacement):
+        self.placeholders.replace_text(placeholder, replacement)
 
-The following table summarises the markets and timeframes used in this optimisation:"""
+    def replace_with_elements(self, placeholder, elements):
+        if self.body_spool is not None:
+            elements = [self.body_spool.add(elements)]
+        self.placeholders.replace_with_elements(placeholder, elements)
+
+    def add_introduction_section(self, doc):
+        intro_text, intro_table = self.model.section("introduction").blocks
 
         # 1
-        self.replace_placeholder(doc, "[intro_text]", intro_text)
+        self.replace_placeholder(doc, "[intro_text]", intro_text.text)
 
         # 2
-        for paragraph in doc.paragraphs:
-            if "[intro_table]" in paragraph.text:
-                table = doc.add_table(rows=1, cols=5)
-                table.style = "Table Grid"
-                
-                headers = ["Market", "Timeframe", "Data Source", "Optimisation Timespan", "Out-of-Sample Timespan"]
-                for i, header in enumerate(headers):
-                    table.cell(0, i).text = header
-
-                for row_data in self.intro_tab.get_intro_table_data():
-                    cells = table.add_row().cells
-                    for i, value in enumerate(row_data):
-                        cells[i].text = str(value)
-
-                p = paragraph._element
-                p.getparent().replace(p, table._element)
-                break
+        if "[intro_table]" in self.placeholders:
+            self.replace_with_elements("[intro_table]", self.render_table(doc, intro_table))
 
         # 3
-        self.replace_placeholder(doc, "[strategy_name]", self.intro_tab.get_strategy_name())
+        self.replace_placeholder(doc, "[strategy_name]", self.model.title)
         
     def add_results_section(self, doc):
-        for i, paragraph in enumerate(doc.paragraphs):
-            if "[results_table]" in paragraph.text:
-                results_data = self.results_tab.get_results_data()
-
-                for index, (market, data) in enumerate(results_data.items(), start=1):
-                    market_title = doc.add_paragraph(f"3.{index} {market}")
-                    self.style_manager.apply_style_to_paragraph(market_title, "Heading 2")
-                    paragraph._element.addnext(market_title._element)
-
-                    if data["notes"]:
-                        notes_paragraph = doc.add_paragraph(data["notes"])
-                        market_title._element.addnext(notes_paragraph._element)
-                        spacing_paragraph = doc.add_paragraph()
-                        notes_paragraph._element.addnext(spacing_paragraph._element)
-                    else:
-                        spacing_paragraph = market_title
-
-                    if data["equity_curve"]:
-                        image_stream = io.BytesIO(data["equity_curve"])
-                        img_paragraph = doc.add_paragraph()
-                        img_paragraph.add_run().add_picture(image_stream, width=Inches(6))
-                        spacing_paragraph._element.addnext(img_paragraph._element)
-                        spacing_paragraph = img_paragraph
-
-                    if data["performance_metrics"]:
-                        image_stream = io.BytesIO(data["performance_metrics"])
-                        img_paragraph = doc.add_paragraph()
-                        img_paragraph.add_run().add_picture(image_stream, width=Inches(6))
-                        spacing_paragraph._element.addnext(img_paragraph._element)
-
-                    final_spacing_paragraph = doc.add_paragraph()
-                    img_paragraph._element.addnext(final_spacing_paragraph._element)
-
-                p = paragraph._element
-                p.getparent().remove(p)
-                break
+        placeholder = self.placeholders.first("[results_table]")
+        if placeholder is None:
+            return
+
+        # A comparison groups markets under one section per strategy
+        sections = self.model.section("results").children
+        markets = [market for section in sections for market in section.children or [section]]
+        previous = placeholder
+        if self.body_spool is not None:
+            placeholder.addnext(self.body_spool.segment())
+            batch_size = LOW_MEMORY_BATCH
+        else:
+            # All at once, so every thread has work
+            batch_size = max(len(markets), 1)
+
+        pending = []
+
+        def emit(elements):
+            nonlocal previous
+            if self.body_spool is not None:
+                # Serialised a batch at a time, once per market is noticeably slower
+                pending.extend(elements)
+            else:
+                previous = _insert_after(previous, elements)
+
+        def flush():
+            if pending:
+                self.body_spool.write(pending)
+                pending.clear()
+
+        # Blocks are stamped in market order, so rIds and drawing ids do not depend on which
+        # thread finished first. Threads are only started when a batch needs them
+        fragments = {}
+        built = 0
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for section in sections:
+                if section.children:
+                    emit(self.render_group(doc, section))
+                for market in section.children or [section]:
+                    if market.key not in fragments:
+                        flush()
+                        batch = markets[built:built + batch_size]
+                        with self.instrumentation.span("build", markets=len(batch)):
+                            fragments = dict(zip([m.key for m in batch], self.build_market_fragments(batch, pool)))
+                        built += len(batch)
+                    self.advance(f"Results: {market.name}")
+                    with self.instrumentation.span("stamp", market=market.name):
+                        emit(fragments[market.key].stamp(self.images))
+        flush()
+
+        self.placeholders.remove("[results_table]")
+
+    def render_group(self, doc, section):
+        heading = build_paragraph(section.title, self.style_manager.style_id(f"Heading {section.level}"))
+        return [heading] + self.render_blocks(doc, section.blocks)
+
+    def build_market_fragments(self, sections, pool):
+        keys = [fingerprint("market", self.template_digest, section) for section in sections]
+        fragments = [self.fragment_cache.get(key) for key in keys]
+        missing = [i for i, fragment in enumerate(fragments) if fragment is None]
+        self.instrumentation.count("fragment_hits", len(fragments) - len(missing))
+        self.instrumentation.count("fragment_misses", len(missing))
+
+        span = self.instrumentation.span
+        # Workers have no span of their own, their markets go under the current "build" span
+        parent = self.instrumentation.current_path()
+
+        def build(i):
+            if self.cancel_event is not None and self.cancel_event.is_set():
+                raise ReportCancelled()
+            with span("market", parent=parent, market=sections[i].name):
+                return self.template.market_block(sections[i].level).fill(sections[i], span)
+
+        if self.max_workers == 1 or len(missing) < 2:
+            built = [build(i) for i in missing]
+        else:
+            built = list(pool.map(build, missing))
+
+        for i, fragment in zip(missing, built):
+            fragments[i] = fragment
+            # Kept for the next render unless memory is what matters
+            if not self.low_memory:
+                self.fragment_cache.put(keys[i], fragment)
+        return fragments
 
     def add_disclaimer_section(self, doc):
         doc.add_page_break()
 
-        disclaimer_title = doc.add_paragraph("Disclaimer")
+        disclaimer = self.model.section("disclaimer")
+        disclaimer_title = doc.add_paragraph(disclaimer.title)
         self.style_manager.apply_style_to_paragraph(disclaimer_title, "Heading 1")
         
-        disclaimer_text = (
-            "This document is provided for informational purposes only. Trading in the financial markets involves "
-            "significant risk and may not be suitable for all investors. Past performance is not indicative of future results. "
-            "Users of related software should conduct their own research and seek advice from a qualified financial advisor "
-            "before making any investment decisions. This report and any associated software do not constitute financial "
-            "advice and are not regulated by financial authorities.\n\n"
-            "While efforts are made to ensure accuracy, the data, analysis, and any predictions or forecasts may not "
-            "always be error-free and do not guarantee profits or predict market movements. Users are solely responsible "
-            "for their investment decisions and any resulting outcomes."
-            "Data Mechanics Ltd. is not responsible for any financial losses incurred through the use of any associated "
-            "software or any information included in this report or any related material. By using this report or "
-            "associated software, you acknowledge and accept these terms and limitations."
-        )   
+        disclaimer_text = disclaimer.blocks[0].text
         disclaimer_paragraph = doc.add_paragraph()
         run = disclaimer_paragraph.add_run(disclaimer_text)
         run.font.name = "Arial"
@@ -156,31 +403,13 @@ The following table summarises the markets and timeframes used in this optimisat
         font.bold = False
 
     def add_parameter_sets_section(self, doc):
-        for paragraph in doc.paragraphs:
-            if "[parameter_set_table]" in paragraph.text:
-                table = doc.add_table(rows=1, cols=7)
-                table.style = "Table Grid"
-                
-                headers = ["Name", "Description", "Default", "Start", "Step", "End", "Best"]
-                for i, header in enumerate(headers):
-                    table.cell(0, i).text = header
-
-                # The parameter data is expected to be a list of lists, where each inner list
-                # contains 7 elements corresponding to the 7 columns of the table.
-                # Each element represents: [Name, Description, Default, Start, Step, End, Best]
-                for row_data in self.param_tab.get_parameter_data():
-                    cells = table.add_row().cells
-                    for i, value in enumerate(row_data):
-                        cells[i].text = str(value)
-
-                p = paragraph._element
-                p.getparent().replace(p, table._element)
-                break
-
-    def save_document(self, doc):
-        save_path = filedialog.asksaveasfilename(defaultextension=".docx")
-        if save_path:
-            doc.save(save_path)
-            messagebox.showinfo("Success", "Report generated successfully!")
-        else:
-            messagebox.showwarning("Cancelled", "Report generation cancelled.")
\ No newline at end of file
+        if "[parameter_set_table]" in self.placeholders:
+            # Columns: [Name, Description, Default, Start, Step, End, Best]
+            parameter_sets = self.model.section("parameter_sets")
+            self.replace_with_elements("[parameter_set_table]", self.render_blocks(doc, parameter_sets.blocks))
+
+    def save_document(self, doc, output_path):
+        writer = DocxWriter(self.compress_level)
+        writer.write(doc, output_path)
+        self.instrumentation.count("stored_entries", writer.stored_entries)
+        self.instrumentation.count("deflated_entries", writer.deflated_entries)
\ No newline at end of file
@@ -0,0 +1,187 @@
+# report/report_model.py
+# What goes into a report, independent of the output format. Built once per render and
+# consumed by the docx generator and the renderers in renderers.py
+from data.report_data import IMAGE_FIELDS, SERIES_FIELD
+
+INTRO_HEADERS = ["Market", "Timeframe", "Data Source", "Optimisation Timespan", "Out-of-Sample Timespan"]
+PARAMETER_HEADERS = ["Name", "Description", "Default", "Start", "Step", "End", "Best"]
+METRIC_HEADERS = ["Metric", "Value"]
+IMAGE_WIDTH_INCHES = 6
+
+DISCLAIMER_TEXT = (
+    "This document is provided for informational purposes only. Trading in the financial markets involves "
+    "significant risk and may not be suitable for all investors. Past performance is not indicative of future results. "
+    "Users of related software should conduct their own research and seek advice from a qualified financial advisor "
+    "before making any investment decisions. This report and any associated software do not constitute financial "
+    "advice and are not regulated by financial authorities.\n\n"
+    "While efforts are made to ensure accuracy, the data, analysis, and any predictions or forecasts may not "
+    "always be error-free and do not guarantee profits or predict market movements. Users are solely responsible "
+    "for their investment decisions and any resulting outcomes."
+    "Data Mechanics Ltd. is not responsible for any financial losses incurred through the use of any associated "
+    "software or any information included in this report or any related material. By using this report or "
+    "associated software, you acknowledge and accept these terms and limitations."
+)
+
+# The reprs are what section fingerprints are built from, so they include every input
+
+class TextBlock:
+    def __init__(self, text, style=None):
+        self.text = text
+        self.style = style
+
+    def __repr__(self):
+        return f"TextBlock({self.text!r}, {self.style!r})"
+
+class TableBlock:
+    def __init__(self, name, headers, rows):
+        self.name = name
+        self.headers = headers
+        self.rows = rows
+
+    def __repr__(self):
+        return f"TableBlock({self.name!r}, {self.headers!r}, {self.rows!r})"
+
+class ImageBlock:
+    def __init__(self, handle, width_inches=IMAGE_WIDTH_INCHES, alt='', name=None):
+        self.handle = handle
+        self.width_inches = width_inches
+        self.alt = alt
+        # Which image field it came from, templates place images by it
+        self.name = name
+
+    def __repr__(self):
+        return f"ImageBlock({self.handle.sha1!r}, {self.width_inches!r}, {self.alt!r}, {self.name!r})"
+
+class Section:
+    def __init__(self, key, title, blocks=None, children=None, level=1, name=None):
+        self.key = key
+        self.title = title
+        self.name = name or title
+        self.blocks = blocks or []
+        self.children = children or []
+        self.level = level
+
+    def __repr__(self):
+        return (f"Section({self.key!r}, {self.title!r}, {self.blocks!r}, {self.children!r}, {self.level!r}, "
+                f"{self.name!r})")
+
+class ReportModel:
+    def __init__(self, title, sections):
+        self.title = title
+        self.sections = sections
+
+    def section(self, key):
+        return next((section for section in self.sections if section.key == key), None)
+
+    def images(self):
+        # Every image block, in document order
+        def walk(sections):
+            for section in sections:
+                for block in section.blocks:
+                    if isinstance(block, ImageBlock):
+                        yield block
+                yield from walk(section.children)
+        return list(walk(self.sections))
+
+def intro_text(data):
+    # TODO: Make points align left. Looks weird aligned middle.
+    return f"""
+
+This report presents the optimisation results for {data.strategy_name}, focusing on enhancing its performance through parameter tuning. Our analysis aimed to {data.specific_goal}.
+
+Key Points:
+• Optimisation Method: {data.optimisation_method}
+• Target Performance Metric: {data.target_performance}
+• Data Range: [brief description of the data used, e.g., "5 years of historical data (2018-2023)"]
+
+Sections 2.0 and 3.0 provide detailed insights into the optimisation parameters and resulting performance metrics, respectively.
+
+The following table summarises the markets and timeframes used in this optimisation:"""
+
+def market_section(index, market, data, optimised_images=None, level=2, equity=None):
+    # equity maps (series hash, timeframe) to the metric rows and chart derived from the series,
+    # which take the place of the uploaded screenshots
+    blocks = []
+    if data["notes"]:
+        blocks.append(TextBlock(data["notes"]))
+    series = data.get(SERIES_FIELD)
+    analysis = (equity or {}).get((series.sha1, data["timeframe"])) if series else None
+    for field in IMAGE_FIELDS:
+        handle = data[field]
+        if analysis is not None and field == "equity_curve":
+            blocks.append(ImageBlock(analysis[1], alt=f"{market} equity curve", name=field))
+        elif analysis is not None and field == "performance_metrics":
+            blocks.append(TableBlock(field, METRIC_HEADERS, analysis[0]))
+        elif handle:
+            handle = (optimised_images or {}).get(handle.sha1, handle)
+            blocks.append(ImageBlock(handle, alt=f"{market} {field.replace('_', ' ')}", name=field))
+    return Section(f"market-{index}", f"3.{index} {market}", blocks, level=level, name=market)
+
+def build_report_model(report_data, optimised_images=None, equity=None):
+    # optimised_images maps an original image hash to the handle to show instead
+    markets = [market_section(index, market, data, optimised_images, equity=equity)
+               for index, (market, data) in enumerate(report_data.get_results_data().items(), start=1)]
+    return ReportModel(report_data.strategy_name, [
+        Section("introduction", "1.0 Introduction", [
+            TextBlock(intro_text(report_data)),
+            TableBlock("intro_table", INTRO_HEADERS, report_data.get_intro_table_data()),
+        ]),
+        Section("parameter_sets", "2.0 Optimisation Parameters", [
+            TableBlock("parameter_set_table", PARAMETER_HEADERS, report_data.get_parameter_data()),
+        ]),
+        Section("results", "3.0 Results", children=markets),
+        Section("disclaimer", "Disclaimer", [TextBlock(DISCLAIMER_TEXT)]),
+    ])
+
+def comparison_intro_text(reports):
+    strategies = "\n".join(f"• {data.strategy_name}: {data.optimisation_method}, targeting {data.target_performance}"
+                           for data in reports)
+    return f"""
+
+This report compares the optimisation results of {len(reports)} strategies side by side.
+
+Strategies:
+{strategies}
+
+Section 2.0 lists the optimisation parameters of every strategy and the best values each one found. Section 3.0 presents the results of each strategy by market.
+
+The following table summarises the markets and timeframes used by each strategy:"""
+
+def strategy_text(data):
+    return f"""Goal: {data.specific_goal}
+Optimisation Method: {data.optimisation_method}
+Target Performance Metric: {data.target_performance}"""
+
+def best_parameter_rows(reports):
+    # One row per parameter name, with the best value each strategy found for it
+    best = {}
+    for column, data in enumerate(reports):
+        for row in data.get_parameter_data():
+            if row and row[0]:
+                best.setdefault(row[0], [''] * len(reports))[column] = row[6] if len(row) > 6 else ''
+    return [[name] + values for name, values in best.items()]
+
+def build_comparison_model(reports, optimised_images=None, equity=None):
+    strategies = []
+    for i, data in enumerate(reports, start=1):
+        markets = [market_section(f"{i}.{j}", market, market_data, optimised_images, level=3, equity=equity)
+                   for j, (market, market_data) in enumerate(data.get_results_data().items(), start=1)]
+        strategies.append(Section(f"strategy-{i}", f"3.{i} {data.strategy_name}", [TextBlock(strategy_text(data))],
+                                  children=markets, level=2, name=data.strategy_name))
+
+    return ReportModel(" vs ".join(data.strategy_name for data in reports), [
+        Section("introduction", "1.0 Introduction", [
+            TextBlock(comparison_intro_text(reports)),
+            TableBlock("intro_table", ["Strategy"] + INTRO_HEADERS,
+                       [[data.strategy_name] + list(row) for data in reports for row in data.get_intro_table_data()]),
+        ]),
+        Section("parameter_sets", "2.0 Optimisation Parameters", [
+            TableBlock("parameter_set_table", ["Strategy"] + PARAMETER_HEADERS,
+                       [[data.strategy_name] + list(row) for data in reports for row in data.get_parameter_data()]),
+            TextBlock("Best values found by each strategy:"),
+            TableBlock("best_parameter_table", ["Name"] + [data.strategy_name for data in reports],
+                       best_parameter_rows(reports)),
+        ]),
+        Section("results", "3.0 Results", children=strategies),
+        Section("disclaimer", "Disclaimer", [TextBlock(DISCLAIMER_TEXT)]),
+    ])
@@ -0,0 +1,22 @@
+# report/scratch_dir.py
+import atexit
+import os
+import shutil
+import tempfile
+import threading
+
+class ScratchDir:
+    # Where derived files such as optimised images and charts are written. Without a path a temporary
+    # directory is made on first use and removed when the process exits
+    def __init__(self, path=None, prefix='report-'):
+        self.path = path
+        self.prefix = prefix
+        self._lock = threading.Lock()
+
+    def get(self):
+        with self._lock:
+            if self.path is None:
+                self.path = tempfile.mkdtemp(prefix=self.prefix)
+                atexit.register(shutil.rmtree, self.path, True)
+            os.makedirs(self.path, exist_ok=True)
+            return self.path
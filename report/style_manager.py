@@ -3,8 +3,18 @@ from docx.shared import Pt, RGBColor
 from docx.enum.style import WD_STYLE_TYPE
 
 class StyleManager:
+    # (name, font, size, bold) applied to every template, part of the key of cached reports
+    STYLES = [
+        ("Title", "Arial", 28, True),
+        ("Heading 1", "Arial", 18, True),
+        ("Heading 2", "Arial", 16, True),
+        ("Normal", "Arial", 12, False),
+    ]
+
     def __init__(self, document):
         self.document = document
+        # Resolving a style by name searches the whole styles part, so ids are looked up once
+        self.style_ids = {}
 
     def create_or_update_style(self, style_name, font_name, font_size, font_color=RGBColor(0, 0, 0), bold=False, italic=False):
         styles = self.document.styles
@@ -19,12 +29,16 @@ class StyleManager:
         font.color.rgb = font_color
         font.bold = bold
         font.italic = italic
+        self.style_ids.pop(style_name, None)
 
     def apply_styles(self):
-        self.create_or_update_style("Title", "Arial", 28, bold=True)
-        self.create_or_update_style("Heading 1", "Arial", 18, bold=True)
-        self.create_or_update_style("Heading 2", "Arial", 16, bold=True)
-        self.create_or_update_style("Normal", "Arial", 12)
+        for style_name, font_name, font_size, bold in self.STYLES:
+            self.create_or_update_style(style_name, font_name, font_size, bold=bold)
+
+    def style_id(self, style_name):
+        if style_name not in self.style_ids:
+            self.style_ids[style_name] = self.document.part.get_style_id(style_name, WD_STYLE_TYPE.PARAGRAPH)
+        return self.style_ids[style_name]
 
     def apply_style_to_paragraph(self, paragraph, style_name):
-        paragraph.style = self.document.styles[style_name]
\ No newline at end of file
+        paragraph._p.style = self.style_id(style_name)
\ No newline at end of file
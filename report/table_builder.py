@@ -0,0 +1,82 @@
+# report/table_builder.py
+import re
+from xml.sax.saxutils import escape
+
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls
+from docx.shared import Emu, Inches
+
+TABLE_STYLE = "Table Grid"
+
+# Characters XML 1.0 cannot carry, python-docx would refuse them as well
+INVALID_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+def block_width(document):
+    section = document.sections[-1]
+    page_width = section.page_width or Inches(8.5)
+    left_margin = section.left_margin or Inches(1)
+    right_margin = section.right_margin or Inches(1)
+    return Emu(page_width - left_margin - right_margin)
+
+def text_xml(value, style_id=None):
+    text = INVALID_XML_CHARS.sub('', str(value))
+    properties = f'<w:pPr><w:pStyle w:val="{escape(style_id)}"/></w:pPr>' if style_id else ''
+    if not text:
+        return f'<w:p>{properties}</w:p>' if properties else '<w:p/>'
+    # Same as cell.text: newlines become breaks, tabs become tabs
+    runs = []
+    for i, line in enumerate(text.split('\n')):
+        if i:
+            runs.append('<w:br/>')
+        for j, piece in enumerate(line.split('\t')):
+            if j:
+                runs.append('<w:tab/>')
+            if piece:
+                runs.append(f'<w:t xml:space="preserve">{escape(piece)}</w:t>')
+    return f"<w:p>{properties}<w:r>{''.join(runs)}</w:r></w:p>"
+
+def build_paragraph(value, style_id=None):
+    return parse_xml(f'<w:body {nsdecls("w")}>{text_xml(value, style_id)}</w:body>')[0]
+
+def table_xml(headers, rows, style_id, width, repeat_header):
+    cols = len(headers)
+    col_width = Emu(width // cols).twips if cols else 0
+    cell_start = f'<w:tc><w:tcPr><w:tcW w:type="dxa" w:w="{col_width}"/></w:tcPr>'
+    empty_row = [''] * cols
+
+    parts = [
+        f'<w:tbl {nsdecls("w")}><w:tblPr>',
+        f'<w:tblStyle w:val="{escape(style_id)}"/>' if style_id else '',
+        '<w:tblW w:type="auto" w:w="0"/>'
+        '<w:tblLook w:firstColumn="1" w:firstRow="1" w:lastColumn="0" w:lastRow="0" '
+        'w:noHBand="0" w:noVBand="1" w:val="04A0"/></w:tblPr><w:tblGrid>',
+        f'<w:gridCol w:w="{col_width}"/>' * cols,
+        '</w:tblGrid>',
+        # Header row repeats at the top of every page the table runs onto
+        '<w:tr><w:trPr><w:tblHeader/></w:trPr>' if repeat_header else '<w:tr>',
+    ]
+    parts.extend(cell_start + text_xml(header) + '</w:tc>' for header in headers)
+    parts.append('</w:tr>')
+    for row in rows:
+        row = (list(row) + empty_row)[:cols]
+        parts.append('<w:tr>')
+        parts.extend(cell_start + text_xml(value) + '</w:tc>' for value in row)
+        parts.append('</w:tr>')
+    parts.append('</w:tbl>')
+    return ''.join(parts)
+
+def build_table(document, headers, rows, style=TABLE_STYLE, max_rows=None, repeat_header=True):
+    """Return the elements for a table of `rows`, split every `max_rows` rows."""
+    style_id = document.styles[style].style_id if style else None
+    width = block_width(document)
+    rows = list(rows)
+    if not max_rows or len(rows) <= max_rows:
+        return [parse_xml(table_xml(headers, rows, style_id, width, repeat_header))]
+
+    elements = []
+    for start in range(0, len(rows), max_rows):
+        if elements:
+            # Adjacent tables would be merged by Word without a paragraph in between
+            elements.append(parse_xml(f'<w:p {nsdecls("w")}/>'))
+        elements.append(parse_xml(table_xml(headers, rows[start:start + max_rows], style_id, width, repeat_header)))
+    return elements
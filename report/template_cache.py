@@ -0,0 +1,116 @@
+# report/template_cache.py
+import copy
+import hashlib
+import os
+import threading
+
+from docx import Document
+from docx.opc.part import XmlPart
+from docx.package import Package
+from .market_block import MarketBlock
+from .placeholders import PlaceholderIndex
+from .style_manager import StyleManager
+from .table_builder import TABLE_STYLE, block_width
+
+class Template:
+    def __init__(self, path, document, stat_key, digest, market_blocks):
+        self.path = path
+        self.document = document
+        self.stat_key = stat_key
+        self.digest = digest
+        # By heading level of the market sections
+        self.market_blocks = market_blocks
+        self.placeholders = PlaceholderIndex.build(document)
+
+    def clone(self):
+        # Deep copy the parsed XML of every part, binary parts (media) share the template's bytes
+        source = self.document.part.package
+        package = Package()
+        parts = {}
+        for part in source.iter_parts():
+            if isinstance(part, XmlPart):
+                parts[part] = type(part)(part.partname, part.content_type, copy.deepcopy(part.element), package)
+            else:
+                parts[part] = type(part).load(part.partname, part.content_type, part.blob, package)
+
+        _copy_rels(source, package, parts)
+        for part, cloned_part in parts.items():
+            _copy_rels(part, cloned_part, parts)
+
+        package.after_unmarshal()
+        return package.main_document_part.document
+
+    def market_block(self, level):
+        return self.market_blocks.get(level, self.market_blocks[2])
+
+def _copy_rels(source, target, parts):
+    for rel in source.rels.values():
+        rel_target = rel.target_ref if rel.is_external else parts[rel.target_part]
+        target.load_rel(rel.reltype, rel_target, rel.rId, rel.is_external)
+
+def _stat_key(path):
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+def _file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class TemplateCache:
+    def __init__(self):
+        self._templates = {}
+        self._lock = threading.Lock()
+
+    def get(self, path):
+        path = os.path.abspath(path)
+        with self._lock:
+            stat_key = _stat_key(path)
+            template = self._templates.get(path)
+            if template is not None and template.stat_key == stat_key:
+                return template
+
+            digest = _file_digest(path)
+            if template is not None and template.digest == digest:
+                # Touched but not modified
+                template.stat_key = stat_key
+                return template
+
+            template = self._load(path, stat_key, digest)
+            self._templates[path] = template
+            return template
+
+    def digest(self, path):
+        # Content hash of the template without loading it
+        path = os.path.abspath(path)
+        with self._lock:
+            template = self._templates.get(path)
+            if template is not None and template.stat_key == _stat_key(path):
+                return template.digest
+        return _file_digest(path)
+
+    def _load(self, path, stat_key, digest):
+        document = Document(path)
+        style_manager = StyleManager(document)
+        style_manager.apply_styles()
+        # Taken out of the body before placeholders are indexed, clones never see it
+        table_style_id = document.styles[TABLE_STYLE].style_id if TABLE_STYLE in document.styles else None
+        table_width = block_width(document)
+        market_block = MarketBlock.extract(document, table_style_id, table_width)
+        if market_block is not None:
+            market_blocks = {2: market_block}
+        else:
+            # The built-in layout, titled with the heading for the market's level
+            market_blocks = {level: MarketBlock.default(style_manager.style_id(f"Heading {level}"), table_style_id,
+                                                        table_width)
+                             for level in (2, 3) if f"Heading {level}" in document.styles}
+        return Template(path, document, stat_key, digest, market_blocks)
+
+    def clear(self):
+        with self._lock:
+            self._templates.clear()
+
+# One cache per process, batch workers each warm their own
+template_cache = TemplateCache()
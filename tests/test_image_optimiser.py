@@ -0,0 +1,30 @@
+# tests/test_image_optimiser.py
+from PIL import Image
+
+from data import ImageStore
+from data.image_handle import ImageHandle
+from report.image_optimiser import ImageOptimiser
+
+def _transparent_palette_png(path, size=(400, 200)):
+    image = Image.new('P', size, 0)
+    image.putpalette([0, 0, 0, 255, 0, 0, 0, 0, 255] + [0] * (256 * 3 - 9))
+    for x in range(0, size[0], 4):
+        image.putpixel((x, x % size[1]), 1 + x % 2)
+    image.save(path, transparency=0)
+    return path
+
+def _optimise(tmp_path, **options):
+    source = _transparent_palette_png(str(tmp_path / 'chart.png'))
+    optimiser = ImageOptimiser(cache_dir=str(tmp_path / 'cache'), **options)
+    return optimiser.optimise(ImageHandle.from_path(source), ImageStore())
+
+def test_quantise_transparent_palette_png(tmp_path):
+    handle = _optimise(tmp_path, target_dpi=None, colours=16)
+    assert handle.format == 'PNG'
+
+def test_quantise_and_resize_transparent_palette_png(tmp_path):
+    handle = _optimise(tmp_path, target_dpi=50, width_inches=2, colours=16)
+    assert handle.width == 100
+    with handle.open() as f, Image.open(f) as image:
+        assert image.mode == 'P'
+        assert 'transparency' in image.info